@@ -1,9 +1,36 @@
 """Configuration management for VibeVoice API."""
 
 import os
-from typing import Optional
+import json
+import logging
+import functools
+from typing import Any, Optional
 from pydantic_settings import BaseSettings
-from pydantic import Field
+from pydantic import Field, PrivateAttr, field_validator
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=1)
+def _flash_attn_available() -> bool:
+    """
+    Probe once for a usable FlashAttention-2 install; failed imports are slow
+    to repeat.
+
+    Checks for flash_attn 2.x and a GPU it supports (compute capability 8.0+),
+    the two things that otherwise only fail inside ``from_pretrained``.
+    """
+    try:
+        import flash_attn
+    except ImportError:
+        return False
+
+    if not str(getattr(flash_attn, "__version__", "0")).startswith("2."):
+        return False
+
+    import torch
+
+    return torch.cuda.is_available() and torch.cuda.get_device_capability()[0] >= 8
 
 
 class Settings(BaseSettings):
@@ -26,7 +53,7 @@ class Settings(BaseSettings):
     )
     vibevoice_attn_implementation: Optional[str] = Field(
         default=None,
-        description="Attention implementation: flash_attention_2, sdpa, or eager (auto-detected if None)",
+        description="Attention implementation: flash_attention_2, sdpa, or eager (sdpa if None)",
     )
     torch_compile: bool = Field(
         default=False,
@@ -36,20 +63,43 @@ class Settings(BaseSettings):
         default=None,
         description="Quantization method: 'int8_torchao', 'int4_torchao', 'nf4_bnb', or None for full precision",
     )
+    quantization_min_numel: int = Field(
+        default=1_048_576,
+        description="torchao quantization skips Linear layers with fewer weights than this (dequant overhead outweighs the savings)",
+    )
     torch_compile_mode: str = Field(
         default="default",
         description="torch.compile mode: 'default', 'reduce-overhead', or 'max-autotune' (slower compile, faster inference)",
     )
+    torch_compile_language_model: bool = Field(
+        default=False,
+        description="Also compile the Qwen2 decoder (variable sequence lengths can trigger recompiles); the diffusion head is always compiled when TORCH_COMPILE is set",
+    )
 
     # Voice Configuration
     voices_dir: str = Field(
         default="/app/voices",  # Docker default; override with VOICES_DIR=demo/voices for local dev
         description="Directory containing voice preset audio files",
     )
-    openai_voice_mapping: str = Field(
-        default='{"alloy": "es-Argentinian_female", "echo": "es-Argentinian_female", "fable": "es-Argentinian_female", "onyx": "es-Argentinian_female", "nova": "es-Argentinian_female", "shimmer": "es-Argentinian_female"}',
+    voice_cache_dir: Optional[str] = Field(
+        default=None,
+        description="Directory for pre-resampled .npy copies of voice presets, so cold starts skip decoding (unset = disabled)",
+    )
+    openai_voice_mapping: dict[str, str] = Field(
+        default={
+            "alloy": "es-Argentinian_female",
+            "echo": "es-Argentinian_female",
+            "fable": "es-Argentinian_female",
+            "onyx": "es-Argentinian_female",
+            "nova": "es-Argentinian_female",
+            "shimmer": "es-Argentinian_female",
+        },
         description="JSON mapping of OpenAI voice names to VibeVoice preset names",
     )
+    max_voice_sample_bytes: int = Field(
+        default=10 * 1024 * 1024,  # 10 MB
+        description="Maximum decoded size of a base64 voice sample upload in bytes",
+    )
 
     # API Server Configuration
     api_host: str = Field(default="0.0.0.0", description="API server host")
@@ -57,6 +107,18 @@ class Settings(BaseSettings):
     api_workers: int = Field(
         default=1, description="Number of API workers (keep at 1 for model loading)"
     )
+    max_concurrent_inference: int = Field(
+        default=1,
+        description="Max generations running on the model at once; extra requests queue",
+    )
+    max_batch_size: int = Field(
+        default=1,
+        description="Max concurrent non-streaming requests coalesced into one model call (1 disables batching)",
+    )
+    batch_window_ms: float = Field(
+        default=10.0,
+        description="How long to wait for more requests to join a batch, in milliseconds",
+    )
     api_cors_origins: str = Field(
         default="*", description="CORS allowed origins (comma-separated)"
     )
@@ -91,6 +153,15 @@ class Settings(BaseSettings):
     default_repetition_penalty: float = Field(
         default=1.0, description="Repetition penalty (1.0 = no penalty)"
     )
+    response_cache_size: int = Field(
+        default=128,
+        description="Max cached responses for seeded, non-streaming generations (0 disables)",
+    )
+
+    # Cached hardware probes (resolved on first use)
+    _device: Optional[str] = PrivateAttr(default=None)
+    _dtype: Any = PrivateAttr(default=None)
+    _attn_implementation: Optional[str] = PrivateAttr(default=None)
 
     # Logging
     log_level: str = Field(
@@ -98,7 +169,15 @@ class Settings(BaseSettings):
         description="Logging level: DEBUG, INFO, WARNING, ERROR, CRITICAL (case-insensitive)",
     )
 
-    @property
+    @field_validator("openai_voice_mapping", mode="before")
+    @classmethod
+    def parse_openai_voice_mapping(cls, v):
+        """Parse the voice mapping from a JSON string once, at settings load."""
+        if isinstance(v, str):
+            return json.loads(v)
+        return v
+
+    @functools.cached_property
     def normalized_log_level(self) -> str:
         """Get log level normalized to uppercase for logging module."""
         return self.log_level.upper()
@@ -108,7 +187,7 @@ class Settings(BaseSettings):
         env_file_encoding = "utf-8"
         case_sensitive = False
 
-    @property
+    @functools.cached_property
     def cors_origins_list(self) -> list[str]:
         """Parse CORS origins from comma-separated string."""
         if self.api_cors_origins == "*":
@@ -117,18 +196,24 @@ class Settings(BaseSettings):
 
     def get_device(self) -> str:
         """Get the appropriate device, checking availability and free memory."""
+        if self._device is None:
+            self._device = self._detect_device()
+        return self._device
+
+    def _detect_device(self) -> str:
+        """Probe CUDA/MPS availability and pick a device."""
         import torch
 
         if self.vibevoice_device.startswith("cuda"):
             if not torch.cuda.is_available():
-                print("WARNING: CUDA requested but not available, falling back to CPU")
+                logger.warning("CUDA requested but not available, falling back to CPU")
                 return "cpu"
 
             # If user just said "cuda" (no index), try to find the best one
             if self.vibevoice_device == "cuda":
                 device_count = torch.cuda.device_count()
                 if device_count > 1:
-                    print(f"Detecting best GPU among {device_count} devices...")
+                    logger.info(f"Detecting best GPU among {device_count} devices...")
                     best_device = 0
                     max_free_memory = 0
 
@@ -137,7 +222,7 @@ class Settings(BaseSettings):
                             # free_memory, total_memory = torch.cuda.mem_get_info(i)
                             # mem_get_info returns (free, total) in bytes
                             free_mem, total_mem = torch.cuda.mem_get_info(i)
-                            print(
+                            logger.info(
                                 f"GPU {i}: {free_mem / 1024**3:.2f} GB free / {total_mem / 1024**3:.2f} GB total"
                             )
 
@@ -145,9 +230,9 @@ class Settings(BaseSettings):
                                 max_free_memory = free_mem
                                 best_device = i
                         except Exception as e:
-                            print(f"Error checking GPU {i}: {e}")
+                            logger.warning(f"Error checking GPU {i}: {e}")
 
-                    print(
+                    logger.info(
                         f"Selected GPU {best_device} with {max_free_memory / 1024**3:.2f} GB free memory"
                     )
                     return f"cuda:{best_device}"
@@ -155,12 +240,18 @@ class Settings(BaseSettings):
             return self.vibevoice_device
 
         elif self.vibevoice_device == "mps" and not torch.backends.mps.is_available():
-            print("WARNING: MPS requested but not available, falling back to CPU")
+            logger.warning("MPS requested but not available, falling back to CPU")
             return "cpu"
         return self.vibevoice_device
 
     def get_dtype(self):
         """Get the appropriate dtype for the device."""
+        if self._dtype is None:
+            self._dtype = self._detect_dtype()
+        return self._dtype
+
+    def _detect_dtype(self):
+        """Pick a dtype from settings or the selected device."""
         import torch
 
         if self.vibevoice_dtype:
@@ -176,20 +267,26 @@ class Settings(BaseSettings):
 
     def get_attn_implementation(self) -> str:
         """Get the appropriate attention implementation."""
-        if self.vibevoice_attn_implementation:
-            return self.vibevoice_attn_implementation
-
-        device = self.get_device()
-        if "cuda" in str(device):
-            # Try flash_attention_2 first, fallback to sdpa
-            try:
-                import flash_attn
+        if self._attn_implementation is None:
+            self._attn_implementation = self._detect_attn_implementation()
+        return self._attn_implementation
 
-                return "flash_attention_2"
-            except ImportError:
-                return "sdpa"
-        else:
+    def _detect_attn_implementation(self) -> str:
+        """Pick an attention backend from settings or installed packages."""
+        requested = self.vibevoice_attn_implementation
+        if requested == "flash_attention_2" and not _flash_attn_available():
+            # Resolve this before loading: a failed flash-attn load would
+            # otherwise cost a second full from_pretrained
+            logger.warning(
+                "flash_attention_2 requested but flash-attn 2 is not installed "
+                "or the GPU does not support it; using sdpa"
+            )
             return "sdpa"
+        if requested:
+            return requested
+
+        # SDPA dispatches to fused flash / memory-efficient kernels itself
+        return "sdpa"
 
 
 # Global settings instance
@@ -1,18 +1,41 @@
 """FastAPI application for VibeVoice TTS API."""
 
+import asyncio
 import logging
+import os
 from contextlib import asynccontextmanager
 
+# Must be set before torch initializes CUDA; reduces allocator fragmentation
+# across requests with different sequence lengths
+os.environ.setdefault("PYTORCH_CUDA_ALLOC_CONF", "expandable_segments:True")
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from api.config import settings
+from api.services.batching_service import BatchingService
 from api.services.tts_service import TTSService
 from api.services.voice_manager import VoiceManager
 from api.routers import openai_tts, vibevoice
 
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson (much faster than stdlib json)."""
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        # Numpy scalars/arrays serialize natively instead of raising
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
 # Configure logging
 logging.basicConfig(
     level=getattr(logging, settings.normalized_log_level),
@@ -21,10 +44,41 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+async def _load_and_warmup(app: FastAPI, tts_service: TTSService):
+    """Load the model and run a warmup generation off the event loop."""
+    logger.info("Loading VibeVoice model (this may take a few minutes)...")
+    try:
+        await asyncio.to_thread(tts_service.load_model)
+        logger.info("Model loaded successfully!")
+
+        logger.info("Warming up model...")
+        await asyncio.to_thread(tts_service.warmup, runs=2)
+    except Exception as e:
+        logger.exception(f"Failed to load model: {e}")
+        # Keep serving so /health can report why; TTS endpoints return 503
+        app.state.model_error = f"{type(e).__name__}: {e}"
+        return
+
+    app.state.model_ready.set()
+    logger.info("API server ready!")
+
+
+async def _preload_voices(voice_manager: VoiceManager):
+    """Decode all voice presets into the cache off the event loop."""
+    try:
+        loaded = await asyncio.to_thread(voice_manager.preload_voices)
+        logger.info(f"Preloaded {loaded} voice presets")
+    except Exception as e:
+        logger.exception(f"Failed to preload voice presets: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Lifespan context manager for startup and shutdown events.
+
+    The model is loaded in the background so the server (and ``/health``)
+    comes up immediately; TTS endpoints return 503 until warmup finishes.
     """
     # Startup
     logger.info("Starting VibeVoice API server...")
@@ -36,36 +90,51 @@ async def lifespan(app: FastAPI):
     logger.info("Initializing voice manager...")
     voice_manager = VoiceManager(
         voices_dir=settings.voices_dir,
-        openai_voice_mapping=settings.openai_voice_mapping
+        openai_voice_mapping=settings.openai_voice_mapping,
+        cache_dir=settings.voice_cache_dir,
     )
     
     # Initialize TTS service
     logger.info("Initializing TTS service...")
     tts_service = TTSService(settings)
     
-    # Load model
-    logger.info("Loading VibeVoice model (this may take a few minutes)...")
-    try:
-        tts_service.load_model()
-        logger.info("Model loaded successfully!")
-    except Exception as e:
-        logger.error(f"Failed to load model: {e}")
-        import traceback
-        traceback.print_exc()
-        raise
-    
     # Set global service instances in routers
     openai_tts.tts_service = tts_service
     openai_tts.voice_manager = voice_manager
     vibevoice.tts_service = tts_service
     vibevoice.voice_manager = voice_manager
     
-    logger.info("API server ready!")
+    # Coalesce concurrent non-streaming requests into batched model calls
+    batching_service = None
+    if settings.max_batch_size > 1:
+        logger.info(
+            f"Request batching enabled (max {settings.max_batch_size}, "
+            f"window {settings.batch_window_ms}ms)"
+        )
+        batching_service = BatchingService(
+            tts_service,
+            max_batch_size=settings.max_batch_size,
+            batch_window_ms=settings.batch_window_ms,
+        )
+        batching_service.start()
+    openai_tts.batching_service = batching_service
+    vibevoice.batching_service = batching_service
+    
+    # Decode voice presets and load/warm up the model in the background
+    app.state.model_ready = asyncio.Event()
+    app.state.model_error = None
+    preload_task = asyncio.create_task(_preload_voices(voice_manager))
+    load_task = asyncio.create_task(_load_and_warmup(app, tts_service))
     
     yield
     
     # Shutdown
     logger.info("Shutting down VibeVoice API server...")
+    for task in (preload_task, load_task):
+        if not task.done():
+            task.cancel()
+    if batching_service is not None:
+        await batching_service.stop()
 
 
 # Create FastAPI app
@@ -73,7 +142,8 @@ app = FastAPI(
     title="VibeVoice TTS API",
     description="OpenAI-compatible Text-to-Speech API powered by VibeVoice",
     version="0.1.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse if orjson is not None else JSONResponse
 )
 
 # Add CORS middleware
@@ -115,17 +185,25 @@ async def root():
 
 @app.get("/health")
 async def health():
-    """Simple health check endpoint."""
-    return {"status": "healthy"}
+    """Simple health check endpoint (503 if the model failed to load)."""
+    model_error = getattr(app.state, "model_error", None)
+    if model_error is not None:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "unhealthy", "model_ready": False, "error": model_error},
+        )
+    model_ready = getattr(app.state, "model_ready", None)
+    return {
+        "status": "healthy",
+        "model_ready": model_ready is not None and model_ready.is_set()
+    }
 
 
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Handle uncaught exceptions."""
-    logger.error(f"Unhandled exception: {exc}")
-    import traceback
-    traceback.print_exc()
+    logger.exception(f"Unhandled exception: {exc}", exc_info=exc)
     
     return JSONResponse(
         status_code=500,
@@ -147,6 +225,8 @@ if __name__ == "__main__":
         host=settings.api_host,
         port=settings.api_port,
         workers=settings.api_workers,
+        loop="uvloop",
+        http="httptools",
         log_level=settings.normalized_log_level.lower()
     )
 
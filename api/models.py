@@ -1,7 +1,7 @@
 """Pydantic models for API request/response schemas."""
 
 from typing import Optional, Literal, List
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
 # ============================================================
@@ -57,14 +57,16 @@ class SpeakerConfig(BaseModel):
         default=None, description="Base64-encoded audio sample for voice cloning"
     )
 
-    @validator("voice_preset", "voice_sample_base64")
-    def validate_voice_source(cls, v, values):
+    model_config = ConfigDict(frozen=True)
+
+    @model_validator(mode="after")
+    def validate_voice_source(self) -> "SpeakerConfig":
         """Ensure at least one voice source is provided."""
-        if "voice_preset" in values and not values.get("voice_preset") and not v:
+        if not self.voice_preset and not self.voice_sample_base64:
             raise ValueError(
                 "Either voice_preset or voice_sample_base64 must be provided"
             )
-        return v
+        return self
 
 
 class VibeVoiceGenerateRequest(BaseModel):
@@ -77,8 +79,8 @@ class VibeVoiceGenerateRequest(BaseModel):
     )
     speakers: List[SpeakerConfig] = Field(
         ...,
-        min_items=1,
-        max_items=4,
+        min_length=1,
+        max_length=4,
         description="Speaker configurations (1-4 speakers)",
     )
     cfg_scale: Optional[float] = Field(
@@ -103,16 +105,19 @@ class VibeVoiceGenerateRequest(BaseModel):
         default=None, description="Random seed for reproducibility"
     )
 
-    @validator("speakers")
-    def validate_speaker_ids(cls, v):
+    @model_validator(mode="after")
+    def validate_speaker_ids(self) -> "VibeVoiceGenerateRequest":
         """Ensure speaker IDs are sequential starting from 0."""
-        speaker_ids = sorted([s.speaker_id for s in v])
-        expected_ids = list(range(len(v)))
+        speaker_ids = [s.speaker_id for s in self.speakers]
+        expected_ids = list(range(len(speaker_ids)))
+        # Only sort when the client sent speakers out of order
         if speaker_ids != expected_ids:
-            raise ValueError(
-                f"Speaker IDs must be sequential starting from 0. Got: {speaker_ids}"
-            )
-        return v
+            speaker_ids.sort()
+            if speaker_ids != expected_ids:
+                raise ValueError(
+                    f"Speaker IDs must be sequential starting from 0. Got: {speaker_ids}"
+                )
+        return self
 
 
 class VibeVoiceGenerateResponse(BaseModel):
@@ -1,17 +1,19 @@
 """OpenAI-compatible TTS endpoint."""
 
+import asyncio
 import logging
 import time
-from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import Response, StreamingResponse
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import Response
 
-from api.models import OpenAITTSRequest, ErrorResponse
+from api.models import OpenAITTSRequest
+from api.services.batching_service import BatchingService
 from api.services.tts_service import TTSService
 from api.services.voice_manager import VoiceManager
-from api.utils.audio_utils import audio_to_bytes, get_content_type, get_audio_duration
-from api.utils.streaming import create_streaming_response
+from api.utils.audio_utils import audio_to_bytes, get_content_type
 from api.utils.language_utils import detect_language
-from api.utils.text_utils import sanitize_text
+from api.utils.text_utils import preview_text, sanitize_text
 from api.config import settings
 
 logger = logging.getLogger(__name__)
@@ -22,12 +24,30 @@ router = APIRouter(prefix="/v1/audio", tags=["OpenAI Compatible"])
 # Global service instances (initialized in main.py)
 tts_service: TTSService = None
 voice_manager: VoiceManager = None
-
-
-def get_tts_service() -> TTSService:
-    """Dependency to get TTS service."""
-    if tts_service is None or not tts_service.is_loaded:
-        raise HTTPException(status_code=503, detail="TTS service not ready")
+# Set when request batching is enabled (MAX_BATCH_SIZE > 1)
+batching_service: BatchingService = None
+
+# Small dedicated pool for text utilities, kept apart from the default
+# executor that runs generation and audio encoding
+_text_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="text-utils")
+
+
+def get_tts_service(request: Request) -> TTSService:
+    """Dependency to get TTS service (503 until the model is warmed up)."""
+    model_ready = getattr(request.app.state, "model_ready", None)
+    if (
+        tts_service is None
+        or not tts_service.is_loaded
+        or model_ready is None
+        or not model_ready.is_set()
+    ):
+        model_error = getattr(request.app.state, "model_error", None)
+        detail = (
+            f"TTS model failed to load: {model_error}"
+            if model_error is not None
+            else "TTS service not ready"
+        )
+        raise HTTPException(status_code=503, detail=detail)
     return tts_service
 
 
@@ -58,27 +78,36 @@ async def create_speech(
                 status_code=400, detail="Input text is empty after sanitization"
             )
 
-        # Detect or use specified language
+        # Detect language on a worker thread while the voice is resolved
+        detection = None
         if request.language == "auto" or request.language is None:
-            detected_language = detect_language(sanitized_input)
-        else:
-            detected_language = request.language
-
-        # Try loading as OpenAI voice first, then as direct VibeVoice preset
-        voice_audio = voices.load_voice_audio(request.voice, is_openai_voice=True)
-
-        # If not found as OpenAI voice, try as direct VibeVoice preset name
-        if voice_audio is None:
-            voice_audio = voices.load_voice_audio(request.voice, is_openai_voice=False)
+            detection = asyncio.get_running_loop().run_in_executor(
+                _text_executor, detect_language, sanitized_input
+            )
 
-        if voice_audio is None:
-            available_openai = ", ".join(voices.OPENAI_VOICE_MAPPING.keys())
-            available_presets = ", ".join(sorted(voices.voice_presets.keys()))
-            raise HTTPException(
-                status_code=400,
-                detail=f"Voice '{request.voice}' not found. OpenAI voices: {available_openai}. VibeVoice presets: {available_presets}",
+        # Resolve as OpenAI voice or direct VibeVoice preset in one lookup
+        # (a cache miss decodes the file, so keep it off the event loop)
+        try:
+            voice_audio = await asyncio.to_thread(
+                voices.load_resolved_voice_audio, request.voice
             )
 
+            if voice_audio is None:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Voice '{request.voice}' not found. OpenAI voices: {voices.openai_voice_names}. VibeVoice presets: {voices.preset_names}",
+                )
+        except BaseException:
+            # The detection result is no longer needed; cancelling also
+            # keeps its exceptions from going unretrieved
+            if detection is not None:
+                detection.cancel()
+            raise
+
+        detected_language = (
+            await detection if detection is not None else request.language
+        )
+
         # Format text as single-speaker script
         formatted_script = tts.format_script_for_single_speaker(
             sanitized_input, speaker_id=0
@@ -86,34 +115,42 @@ async def create_speech(
 
         # Generate speech with timing
         # Note: OpenAI API doesn't support streaming in the same way, but we can use chunked transfer
-        start_time = time.time()
-        audio = tts.generate_speech(
-            text=formatted_script,
-            voice_samples=[voice_audio],
-            cfg_scale=settings.default_cfg_scale,
-            stream=False,  # For OpenAI compatibility, generate all at once
-        )
-        generation_time = time.time() - start_time
+        start_ns = time.perf_counter_ns()
+        if batching_service is not None:
+            # Concurrent requests may share a batched model call
+            audio = await batching_service.generate_speech(
+                text=formatted_script,
+                voice_samples=[voice_audio],
+                cfg_scale=settings.default_cfg_scale,
+            )
+        else:
+            async with tts.inference_semaphore:
+                audio = await asyncio.to_thread(
+                    tts.generate_speech,
+                    text=formatted_script,
+                    voice_samples=[voice_audio],
+                    cfg_scale=settings.default_cfg_scale,
+                    stream=False,  # For OpenAI compatibility, generate all at once
+                )
+        generation_time = (time.perf_counter_ns() - start_ns) / 1e9
 
         # Calculate audio duration
-        audio_duration = get_audio_duration(audio, sample_rate=24000)
+        # Generated audio is mono (samples last) at 24 kHz
+        audio_duration = audio.shape[-1] / 24000.0
 
         # Log generation details at INFO level
-        text_preview = (
-            sanitized_input[:100] + "..."
-            if len(sanitized_input) > 100
-            else sanitized_input
-        )
-        logger.info(
-            f"Generated speech - Text: {text_preview} | Voice: {request.voice} | "
-            f"Model: {request.model} ({settings.vibevoice_model_path}) | "
-            f"Language: {detected_language} | "
-            f"CFG: {settings.default_cfg_scale} | Audio Duration: {audio_duration:.2f}s | Generation Time: {generation_time:.2f}s"
-        )
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                f"Generated speech - Text: {preview_text(sanitized_input)} | Voice: {request.voice} | "
+                f"Model: {request.model} ({settings.vibevoice_model_path}) | "
+                f"Language: {detected_language} | "
+                f"CFG: {settings.default_cfg_scale} | Audio Duration: {audio_duration:.2f}s | Generation Time: {generation_time:.2f}s"
+            )
 
-        # Convert to requested format
-        audio_bytes = audio_to_bytes(
-            audio, sample_rate=24000, format=request.response_format
+        # Convert to requested format (ffmpeg for compressed formats), off
+        # the event loop
+        audio_bytes = await asyncio.to_thread(
+            audio_to_bytes, audio, sample_rate=24000, format=request.response_format
         )
 
         # Return audio response
@@ -129,10 +166,7 @@ async def create_speech(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error generating speech: {e}")
-        import traceback
-
-        traceback.print_exc()
+        logger.exception("Error generating speech")
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -144,23 +178,8 @@ async def list_voices(voices: VoiceManager = Depends(get_voice_manager)):
     Returns OpenAI standard voices (if their mapped presets exist) plus all custom voices.
     """
     try:
-        voice_list = []
-
-        # Add OpenAI standard voices (if their mapped presets exist)
-        for openai_name, vibevoice_preset in voices.OPENAI_VOICE_MAPPING.items():
-            if vibevoice_preset in voices.voice_presets:
-                voice_list.append(
-                    {"id": openai_name, "object": "voice", "name": openai_name}
-                )
-
-        # Add all custom voices from VOICES_DIR
-        all_voices = voices.list_available_voices()
-        for voice in all_voices:
-            # Skip if already added as OpenAI voice
-            if voice["name"] not in voices.OPENAI_VOICE_MAPPING.values():
-                voice_list.append(
-                    {"id": voice["name"], "object": "voice", "name": voice["name"]}
-                )
+        # Built once per preset scan by the voice manager
+        voice_list = voices.list_openai_voice_entries()
 
         return {"object": "list", "data": voice_list}
     except Exception as e:
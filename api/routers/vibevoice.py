@@ -1,22 +1,43 @@
 """VibeVoice-specific TTS endpoints with multi-speaker support."""
 
-import base64
+import asyncio
+import hashlib
+import io
 import logging
+import os
+import threading
 import time
-from fastapi import APIRouter, HTTPException, Depends
+from collections import OrderedDict
+from typing import Callable, List, Tuple
+
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+
+from fastapi import APIRouter, HTTPException, Depends, Request
 from fastapi.responses import Response
+import numpy as np
+import soundfile as sf
 
 from api.models import (
+    SpeakerConfig,
     VibeVoiceGenerateRequest,
     VibeVoiceGenerateResponse,
     VoiceListResponse,
     HealthResponse,
 )
+from api.services.batching_service import BatchingService
 from api.services.tts_service import TTSService
 from api.services.voice_manager import VoiceManager
-from api.utils.audio_utils import audio_to_bytes, get_audio_duration
+from api.utils.audio_utils import (
+    audio_to_bytes,
+    downmix_to_mono,
+    get_content_type,
+    resample_audio,
+)
 from api.utils.streaming import create_streaming_response
-from api.utils.text_utils import sanitize_text
+from api.utils.text_utils import preview_text, sanitize_text
 from api.config import settings
 
 logger = logging.getLogger(__name__)
@@ -27,12 +48,26 @@ router = APIRouter(prefix="/v1/vibevoice", tags=["VibeVoice Extended"])
 # Global service instances (initialized in main.py)
 tts_service: TTSService = None
 voice_manager: VoiceManager = None
-
-
-def get_tts_service() -> TTSService:
-    """Dependency to get TTS service."""
-    if tts_service is None or not tts_service.is_loaded:
-        raise HTTPException(status_code=503, detail="TTS service not ready")
+# Set when request batching is enabled (MAX_BATCH_SIZE > 1)
+batching_service: BatchingService = None
+
+
+def get_tts_service(request: Request) -> TTSService:
+    """Dependency to get TTS service (503 until the model is warmed up)."""
+    model_ready = getattr(request.app.state, "model_ready", None)
+    if (
+        tts_service is None
+        or not tts_service.is_loaded
+        or model_ready is None
+        or not model_ready.is_set()
+    ):
+        model_error = getattr(request.app.state, "model_error", None)
+        detail = (
+            f"TTS model failed to load: {model_error}"
+            if model_error is not None
+            else "TTS service not ready"
+        )
+        raise HTTPException(status_code=503, detail=detail)
     return tts_service
 
 
@@ -43,91 +78,199 @@ def get_voice_manager() -> VoiceManager:
     return voice_manager
 
 
-@router.post("/generate")
-async def generate_speech(
+# LRU cache of encoded audio for seeded, non-streaming generations:
+# key -> (audio bytes, duration in seconds)
+_RESPONSE_CACHE: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+
+
+def _response_cache_key(
     request: VibeVoiceGenerateRequest,
-    tts: TTSService = Depends(get_tts_service),
-    voices: VoiceManager = Depends(get_voice_manager),
-):
+    speakers: List[SpeakerConfig],
+    script: str,
+    inference_steps: int,
+    voices: VoiceManager,
+) -> str:
+    """Hash every input that determines the generated audio."""
+    h = hashlib.blake2b(digest_size=16)
+    for speaker in speakers:
+        if speaker.voice_sample_base64:
+            h.update(b"b64:")
+            h.update(speaker.voice_sample_base64.encode())
+        else:
+            h.update(b"preset:")
+            h.update(str(speaker.voice_preset).encode())
+            # A replaced or rescanned preset file must not hit stale entries
+            path = voices.get_voice_path(speaker.voice_preset)
+            if path:
+                try:
+                    mtime_ns = os.stat(path).st_mtime_ns
+                except OSError:
+                    mtime_ns = 0
+                h.update(f"\0{path}\0{mtime_ns}".encode())
+        h.update(b"\0")
+    h.update(
+        repr(
+            (
+                script,
+                request.cfg_scale,
+                inference_steps,
+                request.seed,
+                request.response_format,
+            )
+        ).encode()
+    )
+    return h.hexdigest()
+
+
+def _describe_voices(speakers: List[SpeakerConfig]) -> str:
+    """Summarize each speaker's voice source for logging."""
+    voice_list = []
+    for speaker_config in speakers:
+        if speaker_config.voice_preset:
+            voice_list.append(
+                f"speaker{speaker_config.speaker_id}={speaker_config.voice_preset}"
+            )
+        else:
+            voice_list.append(f"speaker{speaker_config.speaker_id}=base64_audio")
+    return ", ".join(voice_list)
+
+
+def _audio_headers(duration: float, format: str) -> dict:
+    """Headers shared by the non-streaming audio responses."""
+    return {
+        "Content-Disposition": f"attachment; filename=vibevoice_output.{format}",
+        "X-Audio-Duration": str(duration),
+        "X-Audio-Format": format,
+        "X-Audio-Sample-Rate": "24000",
+    }
+
+
+def _audio_response(audio_bytes: bytes, duration: float, format: str) -> Response:
+    """Build the non-streaming audio response."""
+    return Response(
+        content=audio_bytes,
+        media_type=get_content_type(format),
+        headers=_audio_headers(duration, format),
+    )
+
+
+def _permit_releaser(semaphore: asyncio.Semaphore) -> Callable[[], None]:
     """
-    Generate multi-speaker speech with VibeVoice-specific features.
+    Return a callable that releases an acquired permit exactly once.
 
-    Supports:
-    - Multi-speaker dialogue (up to 4 speakers)
-    - Custom voice samples via base64 or presets
-    - CFG scale control
-    - Inference step control
-    - Real-time streaming via SSE
+    It may be called from any thread; the release itself is scheduled on
+    the event loop that owns the semaphore.
     """
-    try:
-        # Load voice samples for each speaker
-        voice_samples = []
+    loop = asyncio.get_running_loop()
+    lock = threading.Lock()
+    held = [True]
 
-        for speaker_config in sorted(request.speakers, key=lambda s: s.speaker_id):
-            if speaker_config.voice_sample_base64:
-                # Decode base64 audio
-                try:
-                    audio_bytes = base64.b64decode(speaker_config.voice_sample_base64)
-                    import io
-                    import soundfile as sf
+    def release() -> None:
+        with lock:
+            if not held[0]:
+                return
+            held[0] = False
+        try:
+            loop.call_soon_threadsafe(semaphore.release)
+        except RuntimeError:
+            # Event loop already closed (server shutting down)
+            pass
 
-                    audio_data, sr = sf.read(io.BytesIO(audio_bytes))
+    return release
 
-                    # Resample if needed
-                    if sr != 24000:
-                        import librosa
 
-                        audio_data = librosa.resample(
-                            audio_data, orig_sr=sr, target_sr=24000
-                        )
+def _prepare_speaker(speaker_config: SpeakerConfig, voices: VoiceManager) -> np.ndarray:
+    """
+    Load the voice sample for one speaker.
 
-                    # Convert to mono if needed
-                    if len(audio_data.shape) > 1:
-                        import numpy as np
+    Args:
+        speaker_config: Speaker configuration from the request
+        voices: Voice manager for preset lookups
 
-                        audio_data = np.mean(audio_data, axis=1)
+    Returns:
+        Mono float32 voice sample at 24 kHz
 
-                    voice_samples.append(audio_data.astype("float32"))
+    Raises:
+        HTTPException: If the sample is too large, cannot be decoded, or the
+            preset is unknown
+    """
+    if speaker_config.voice_sample_base64:
+        # Reject oversized uploads from the encoded length alone, before
+        # paying for the base64 decode and audio parsing
+        encoded_len = len(speaker_config.voice_sample_base64)
+        if encoded_len * 3 // 4 > settings.max_voice_sample_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=(
+                    f"Voice sample for speaker {speaker_config.speaker_id} exceeds "
+                    f"{settings.max_voice_sample_bytes} bytes"
+                ),
+            )
 
-                except Exception as e:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Failed to decode voice sample for speaker {speaker_config.speaker_id}: {str(e)}",
-                    )
+        # Decode base64 audio
+        try:
+            audio_bytes = base64.b64decode(
+                speaker_config.voice_sample_base64, validate=False
+            )
+            # Decode straight to float32; the float64 default doubles the
+            # bytes moved through downmix and resample
+            audio_data, sr = sf.read(
+                io.BytesIO(audio_bytes), dtype="float32", always_2d=False
+            )
 
-            elif speaker_config.voice_preset:
-                # Load from preset
-                audio_data = voices.load_voice_audio(
-                    speaker_config.voice_preset, is_openai_voice=False
-                )
+            # Convert to mono float32 (before resampling, which
+            # works along the time axis of 1D audio)
+            audio_data = downmix_to_mono(audio_data)
 
-                if audio_data is None:
-                    available_voices = [
-                        v["name"] for v in voices.list_available_voices()
-                    ]
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Voice preset '{speaker_config.voice_preset}' not found. Available: {', '.join(available_voices)}",
-                    )
+            # Resample if needed
+            return resample_audio(audio_data, sr, 24000)
 
-                voice_samples.append(audio_data)
+        except Exception as e:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Failed to decode voice sample for speaker {speaker_config.speaker_id}: {str(e)}",
+            )
 
-            else:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Speaker {speaker_config.speaker_id} must have either voice_preset or voice_sample_base64",
-                )
+    elif speaker_config.voice_preset:
+        # Load from preset
+        audio_data = voices.load_voice_audio(
+            speaker_config.voice_preset, is_openai_voice=False
+        )
 
-        # Extract voice presets for logging
-        voice_list = []
-        for speaker_config in sorted(request.speakers, key=lambda s: s.speaker_id):
-            if speaker_config.voice_preset:
-                voice_list.append(
-                    f"speaker{speaker_config.speaker_id}={speaker_config.voice_preset}"
-                )
-            else:
-                voice_list.append(f"speaker{speaker_config.speaker_id}=base64_audio")
-        voices_str = ", ".join(voice_list)
+        if audio_data is None:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Voice preset '{speaker_config.voice_preset}' not found. Available: {voices.preset_names}",
+            )
+
+        return audio_data
+
+    else:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Speaker {speaker_config.speaker_id} must have either voice_preset or voice_sample_base64",
+        )
+
+
+@router.post("/generate")
+async def generate_speech(
+    request: VibeVoiceGenerateRequest,
+    tts: TTSService = Depends(get_tts_service),
+    voices: VoiceManager = Depends(get_voice_manager),
+):
+    """
+    Generate multi-speaker speech with VibeVoice-specific features.
+
+    Supports:
+    - Multi-speaker dialogue (up to 4 speakers)
+    - Custom voice samples via base64 or presets
+    - CFG scale control
+    - Inference step control
+    - Real-time streaming via SSE
+    """
+    try:
+        # Speakers in script order; shared by cache key, voice loading and logging
+        speakers = sorted(request.speakers, key=lambda s: s.speaker_id)
 
         # Get actual inference_steps value (request value or default from settings)
         actual_inference_steps = (
@@ -143,29 +286,72 @@ async def generate_speech(
                 status_code=400, detail="Script is empty after sanitization"
             )
 
+        # Seeded non-streaming generations are deterministic, so identical
+        # requests can be served from the response cache
+        cache_key = None
+        if (
+            not request.stream
+            and request.seed is not None
+            and settings.response_cache_size > 0
+        ):
+            cache_key = _response_cache_key(
+                request, speakers, sanitized_script, actual_inference_steps, voices
+            )
+            cached = _RESPONSE_CACHE.get(cache_key)
+            if cached is not None:
+                _RESPONSE_CACHE.move_to_end(cache_key)
+                audio_bytes, duration = cached
+                logger.info(f"Serving cached speech (seed {request.seed})")
+                return _audio_response(audio_bytes, duration, request.response_format)
+
+        # Load voice samples for each speaker; decoding is independent per
+        # speaker and releases the GIL, so run the speakers concurrently
+        voice_samples = list(
+            await asyncio.gather(
+                *(
+                    asyncio.to_thread(_prepare_speaker, speaker_config, voices)
+                    for speaker_config in speakers
+                )
+            )
+        )
+
         # Generate speech
         if request.stream:
             # Return streaming response
             # Note: For streaming, we log before generation starts since timing is async
-            text_preview = (
-                sanitized_script[:100] + "..."
-                if len(sanitized_script) > 100
-                else sanitized_script
-            )
-            logger.info(
-                f"Generating speech (streaming) - Text: {text_preview} | Voices: {voices_str} | "
-                f"Model: {settings.vibevoice_model_path} | CFG: {request.cfg_scale} | "
-                f"Steps: {actual_inference_steps} | Seed: {request.seed if request.seed is not None else 'None'}"
-            )
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    f"Generating speech (streaming) - Text: {preview_text(sanitized_script)} | "
+                    f"Voices: {_describe_voices(speakers)} | "
+                    f"Model: {settings.vibevoice_model_path} | CFG: {request.cfg_scale} | "
+                    f"Steps: {actual_inference_steps} | Seed: {request.seed if request.seed is not None else 'None'}"
+                )
 
-            audio_stream = tts.generate_speech(
-                text=sanitized_script,
-                voice_samples=voice_samples,
-                cfg_scale=request.cfg_scale,
-                inference_steps=actual_inference_steps,
-                seed=request.seed,
-                stream=True,
-            )
+            # Seeding, step configuration and input prep happen eagerly in
+            # generate_speech, so they need the permit too; it is released
+            # only once the model has actually stopped, not when the
+            # response stream closes
+            await tts.inference_semaphore.acquire()
+            release = _permit_releaser(tts.inference_semaphore)
+            cancel = threading.Event()
+            try:
+                audio_stream = await asyncio.to_thread(
+                    tts.generate_speech,
+                    text=sanitized_script,
+                    voice_samples=voice_samples,
+                    cfg_scale=request.cfg_scale,
+                    inference_steps=actual_inference_steps,
+                    seed=request.seed,
+                    stream=True,
+                    cancel=cancel,
+                    on_done=release,
+                )
+            except BaseException:
+                # If the worker thread still starts generation, stop it at
+                # once; the releaser ignores its second call
+                cancel.set()
+                release()
+                raise
 
             # For streaming, we can't measure exact time, but log start
             return create_streaming_response(
@@ -173,66 +359,66 @@ async def generate_speech(
                 format=request.response_format,
                 sample_rate=24000,
                 use_sse=True,
+                cancel=cancel,
             )
 
         else:
             # Generate all at once
-            start_time = time.time()
-            audio = tts.generate_speech(
-                text=sanitized_script,
-                voice_samples=voice_samples,
-                cfg_scale=request.cfg_scale,
-                inference_steps=actual_inference_steps,
-                seed=request.seed,
-                stream=False,
-            )
-            generation_time = time.time() - start_time
+            start_ns = time.perf_counter_ns()
+            if batching_service is not None and request.seed is None:
+                # Unseeded requests may share a batched model call
+                audio = await batching_service.generate_speech(
+                    text=sanitized_script,
+                    voice_samples=voice_samples,
+                    cfg_scale=request.cfg_scale,
+                    inference_steps=actual_inference_steps,
+                )
+            else:
+                async with tts.inference_semaphore:
+                    audio = await asyncio.to_thread(
+                        tts.generate_speech,
+                        text=sanitized_script,
+                        voice_samples=voice_samples,
+                        cfg_scale=request.cfg_scale,
+                        inference_steps=actual_inference_steps,
+                        seed=request.seed,
+                        stream=False,
+                    )
+            generation_time = (time.perf_counter_ns() - start_ns) / 1e9
 
             # Calculate audio duration
-            audio_duration = get_audio_duration(audio, sample_rate=24000)
+            # Generated audio is mono (samples last) at 24 kHz
+            audio_duration = audio.shape[-1] / 24000.0
 
             # Log generation details at INFO level
-            text_preview = (
-                sanitized_script[:100] + "..."
-                if len(sanitized_script) > 100
-                else sanitized_script
-            )
-            logger.info(
-                f"Generated speech - Text: {text_preview} | Voices: {voices_str} | "
-                f"Model: {settings.vibevoice_model_path} | CFG: {request.cfg_scale} | "
-                f"Steps: {actual_inference_steps} | Seed: {request.seed if request.seed is not None else 'None'} | "
-                f"Audio Duration: {audio_duration:.2f}s | Generation Time: {generation_time:.2f}s"
-            )
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    f"Generated speech - Text: {preview_text(sanitized_script)} | "
+                    f"Voices: {_describe_voices(speakers)} | "
+                    f"Model: {settings.vibevoice_model_path} | CFG: {request.cfg_scale} | "
+                    f"Steps: {actual_inference_steps} | Seed: {request.seed if request.seed is not None else 'None'} | "
+                    f"Audio Duration: {audio_duration:.2f}s | Generation Time: {generation_time:.2f}s"
+                )
 
             # Convert to requested format
-            audio_bytes = audio_to_bytes(
-                audio, sample_rate=24000, format=request.response_format
+            audio_bytes = await asyncio.to_thread(
+                audio_to_bytes, audio, sample_rate=24000, format=request.response_format
             )
 
-            # Use the already calculated duration
-            duration = audio_duration
+            if cache_key is not None:
+                _RESPONSE_CACHE[cache_key] = (audio_bytes, audio_duration)
+                while len(_RESPONSE_CACHE) > settings.response_cache_size:
+                    _RESPONSE_CACHE.popitem(last=False)
 
             # Return audio response
-            from api.utils.audio_utils import get_content_type
-
-            return Response(
-                content=audio_bytes,
-                media_type=get_content_type(request.response_format),
-                headers={
-                    "Content-Disposition": f"attachment; filename=vibevoice_output.{request.response_format}",
-                    "X-Audio-Duration": str(duration),
-                    "X-Audio-Format": request.response_format,
-                    "X-Audio-Sample-Rate": "24000",
-                },
+            return _audio_response(
+                audio_bytes, audio_duration, request.response_format
             )
 
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error generating speech: {e}")
-        import traceback
-
-        traceback.print_exc()
+        logger.exception("Error generating speech")
         raise HTTPException(status_code=500, detail=str(e))
 
 
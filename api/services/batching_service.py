@@ -0,0 +1,180 @@
+"""Micro-batching of concurrent non-streaming TTS requests."""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from api.services.tts_service import TTSService
+
+logger = logging.getLogger(__name__)
+
+
+class _BatchItem:
+    """One queued generation request."""
+
+    __slots__ = ("text", "voice_samples", "cfg_scale", "inference_steps", "future")
+
+    def __init__(
+        self,
+        text: str,
+        voice_samples: List[np.ndarray],
+        cfg_scale: float,
+        inference_steps: Optional[int],
+        future: asyncio.Future,
+    ):
+        self.text = text
+        self.voice_samples = voice_samples
+        self.cfg_scale = cfg_scale
+        self.inference_steps = inference_steps
+        self.future = future
+
+
+class BatchingService:
+    """
+    Coalesces concurrent non-streaming generations into batched model calls.
+
+    Requests arriving within ``batch_window_ms`` of each other that share a
+    CFG scale and step count run as one ``model.generate`` call, so the
+    per-step decoder and diffusion cost is paid once for the whole batch.
+    """
+
+    def __init__(
+        self,
+        tts_service: TTSService,
+        max_batch_size: int = 4,
+        batch_window_ms: float = 10.0,
+    ):
+        """
+        Initialize batching service.
+
+        Args:
+            tts_service: Loaded TTS service that runs the batches
+            max_batch_size: Maximum requests per model call
+            batch_window_ms: How long to wait for more requests after the first
+        """
+        self.tts_service = tts_service
+        self.max_batch_size = max(1, max_batch_size)
+        self.batch_window = batch_window_ms / 1000.0
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the background batching loop on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the batching loop and fail any requests still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if not item.future.done():
+                item.future.set_exception(RuntimeError("TTS service shutting down"))
+
+    async def generate_speech(
+        self,
+        text: str,
+        voice_samples: List[np.ndarray],
+        cfg_scale: float = 1.3,
+        inference_steps: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Queue a generation and wait for its batch to finish.
+
+        Args:
+            text: Input text (formatted with Speaker labels)
+            voice_samples: List of voice sample arrays
+            cfg_scale: Classifier-free guidance scale
+            inference_steps: Number of diffusion steps (None = use default)
+
+        Returns:
+            Generated audio array
+        """
+        if inference_steps is None:
+            # Resolve the default so it batches with explicit default-step requests
+            inference_steps = self.tts_service.settings.vibevoice_inference_steps
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(
+            _BatchItem(text, voice_samples, cfg_scale, inference_steps, future)
+        )
+        return await future
+
+    async def _run(self):
+        """Collect requests into batches and run them one after another."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+
+            # Wait briefly for more requests to share the model call
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Only requests with the same generation parameters can share a call
+            groups: Dict[Tuple[float, Optional[int]], List[_BatchItem]] = {}
+            for item in batch:
+                groups.setdefault((item.cfg_scale, item.inference_steps), []).append(
+                    item
+                )
+            for (cfg_scale, inference_steps), items in groups.items():
+                await self._run_batch(items, cfg_scale, inference_steps)
+
+    async def _run_batch(
+        self,
+        items: List[_BatchItem],
+        cfg_scale: float,
+        inference_steps: Optional[int],
+    ):
+        """Run one batch on the model and resolve each request's future."""
+        # Skip requests whose client has already gone away
+        items = [item for item in items if not item.future.done()]
+        if not items:
+            return
+
+        tts = self.tts_service
+        try:
+            async with tts.inference_semaphore:
+                if len(items) == 1:
+                    # Nothing to coalesce; use the single-request path
+                    item = items[0]
+                    results = [
+                        await asyncio.to_thread(
+                            tts.generate_speech,
+                            text=item.text,
+                            voice_samples=item.voice_samples,
+                            cfg_scale=cfg_scale,
+                            inference_steps=inference_steps,
+                        )
+                    ]
+                else:
+                    logger.debug(f"Running batched generation of {len(items)} requests")
+                    results = await asyncio.to_thread(
+                        tts.generate_speech_batch,
+                        texts=[item.text for item in items],
+                        voice_samples_list=[item.voice_samples for item in items],
+                        cfg_scale=cfg_scale,
+                        inference_steps=inference_steps,
+                    )
+        except Exception as e:
+            for item in items:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+
+        for item, audio in zip(items, results):
+            if not item.future.done():
+                item.future.set_result(audio)
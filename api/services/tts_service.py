@@ -1,8 +1,11 @@
 """Core TTS generation service wrapping VibeVoice model."""
 
+import asyncio
+import threading
 import torch
 import numpy as np
-from typing import Iterator, List, Optional, Union
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Iterator, List, Optional, Union
 from transformers import set_seed
 import logging
 
@@ -34,6 +37,22 @@ class TTSService:
         self.device = None
         self.dtype = None
         self._model_loaded = False
+        # Diffusion step count the model's scheduler is currently set to
+        self._current_inference_steps = settings.vibevoice_inference_steps
+        # Long-lived worker that runs streaming generations, instead of a
+        # fresh thread per request; one worker also serializes GPU access
+        self._stream_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="tts-stream"
+        )
+        # Per-thread pinned staging buffers for streamed chunk copies
+        self._chunk_buffers = threading.local()
+        # Side stream for host-to-device input copies (CUDA only)
+        self._copy_stream = None
+        # Gate for request handlers: concurrent generations on one GPU
+        # time-slice each other and both finish later than if queued
+        self.inference_semaphore = asyncio.Semaphore(
+            max(1, settings.max_concurrent_inference)
+        )
 
     def load_model(self):
         """Load VibeVoice model and processor."""
@@ -51,8 +70,13 @@ class TTSService:
         print(
             f"Using device: {self.device}, dtype: {self.dtype}, attention: {attn_implementation}"
         )
-        is_cuda_device = str(self.device).startswith("cuda")
-        cuda_device_map = "cuda" if self.device == "cuda" else {"": str(self.device)}
+
+        if str(self.device).startswith("cuda"):
+            # Let cuDNN pick the fastest conv algorithms (tokenizer convs) and
+            # allow TF32 for any remaining float32 matmuls
+            torch.backends.cudnn.benchmark = True
+            torch.set_float32_matmul_precision("high")
+            self._copy_stream = torch.cuda.Stream(device=self.device)
 
         # Load processor
         self.processor = VibeVoiceProcessor.from_pretrained(
@@ -97,72 +121,10 @@ class TTSService:
                     f"Final VRAM usage after moving to GPU: {vram_final:.2f} GB"
                 )
         else:
-            # Standard loading path (no quantization or non-CUDA device)
-            try:
-                if self.device == "mps":
-                    self.model = (
-                        VibeVoiceForConditionalGenerationInference.from_pretrained(
-                            self.settings.vibevoice_model_path,
-                            torch_dtype=self.dtype,
-                            attn_implementation=attn_implementation,
-                            device_map=None,
-                        )
-                    )
-                    self.model.to("mps")
-                elif is_cuda_device:
-                    self.model = (
-                        VibeVoiceForConditionalGenerationInference.from_pretrained(
-                            self.settings.vibevoice_model_path,
-                            torch_dtype=self.dtype,
-                            device_map=cuda_device_map,
-                            attn_implementation=attn_implementation,
-                        )
-                    )
-                else:
-                    self.model = (
-                        VibeVoiceForConditionalGenerationInference.from_pretrained(
-                            self.settings.vibevoice_model_path,
-                            torch_dtype=self.dtype,
-                            device_map="cpu",
-                            attn_implementation=attn_implementation,
-                        )
-                    )
-            except Exception as e:
-                if attn_implementation == "flash_attention_2":
-                    print(f"Flash attention failed: {e}")
-                    print("Falling back to SDPA attention")
-                    attn_implementation = "sdpa"
-
-                    if self.device == "mps":
-                        self.model = (
-                            VibeVoiceForConditionalGenerationInference.from_pretrained(
-                                self.settings.vibevoice_model_path,
-                                torch_dtype=self.dtype,
-                                attn_implementation=attn_implementation,
-                                device_map=None,
-                            )
-                        )
-                        self.model.to("mps")
-                    elif is_cuda_device:
-                        self.model = (
-                            VibeVoiceForConditionalGenerationInference.from_pretrained(
-                                self.settings.vibevoice_model_path,
-                                torch_dtype=self.dtype,
-                                device_map=cuda_device_map,
-                                attn_implementation=attn_implementation,
-                            )
-                        )
-                    else:
-                        self.model = (
-                            VibeVoiceForConditionalGenerationInference.from_pretrained(
-                                self.settings.vibevoice_model_path,
-                                torch_dtype=self.dtype,
-                                device_map="cpu",
-                                attn_implementation=attn_implementation,
-                            )
-                        )
-                else:
-                    raise e
+            # Standard loading path (no quantization or non-CUDA device).
+            # flash_attention_2 is only selected after Settings has probed
+            # for it, so there is no reload-with-sdpa fallback here
+            self.model = self._from_pretrained(attn_implementation)
 
             self.model.eval()
 
@@ -175,14 +137,7 @@ class TTSService:
 
         # Apply torch.compile for optimized inference
         if self.settings.torch_compile:
-            try:
-                compile_mode = self.settings.torch_compile_mode
-                self.model = torch.compile(self.model, mode=compile_mode, dynamic=True)
-                print(
-                    f"Model compiled with torch.compile(mode='{compile_mode}', dynamic=True)"
-                )
-            except Exception as e:
-                print(f"torch.compile() failed: {e}, continuing without compilation")
+            self._compile_model()
 
         # Configure noise scheduler
         self.model.model.noise_scheduler = self.model.model.noise_scheduler.from_config(
@@ -195,13 +150,112 @@ class TTSService:
         self.model.set_ddpm_inference_steps(
             num_steps=self.settings.vibevoice_inference_steps
         )
+        self._current_inference_steps = self.settings.vibevoice_inference_steps
 
         self._model_loaded = True
         print("Model loaded successfully")
 
+    def _from_pretrained(
+        self, attn_implementation: str
+    ) -> VibeVoiceForConditionalGenerationInference:
+        """
+        Load pretrained weights onto the configured device.
+
+        ``low_cpu_mem_usage=True`` makes transformers build the module on the
+        meta device and assign the (memory-mapped) checkpoint tensors directly,
+        so the random weight init that ``from_pretrained`` would overwrite
+        anyway is skipped entirely.
+
+        Args:
+            attn_implementation: Attention backend to request
+
+        Returns:
+            Loaded model
+        """
+        if self.device == "mps":
+            # device_map does not support mps, so materialize on CPU then move
+            model = VibeVoiceForConditionalGenerationInference.from_pretrained(
+                self.settings.vibevoice_model_path,
+                torch_dtype=self.dtype,
+                attn_implementation=attn_implementation,
+                device_map=None,
+                low_cpu_mem_usage=True,
+            )
+            return model.to("mps")
+
+        if str(self.device).startswith("cuda"):
+            # Shards are streamed straight onto the GPU, no CPU copy
+            device_map = "cuda" if self.device == "cuda" else {"": str(self.device)}
+        else:
+            device_map = "cpu"
+
+        return VibeVoiceForConditionalGenerationInference.from_pretrained(
+            self.settings.vibevoice_model_path,
+            torch_dtype=self.dtype,
+            device_map=device_map,
+            attn_implementation=attn_implementation,
+            low_cpu_mem_usage=True,
+        )
+
+    def _compile_model(self):
+        """
+        Compile the compute-heavy submodules with torch.compile.
+
+        ``generate()`` is a Python loop, so compiling the top-level module
+        only wraps ``forward`` and never touches the hot path. Instead the
+        diffusion head (one call per diffusion step) is compiled in place; the
+        first call triggers capture, which the startup warmup absorbs.
+
+        The diffusion head always sees the same shapes (CFG batch x latent
+        dim) for ``inference_steps`` calls per token, so on CUDA it is
+        compiled with ``reduce-overhead`` to replay it as a CUDA graph and
+        skip per-step kernel launch latency. The Qwen2 decoder sees a new
+        sequence length every request and is only compiled (with dynamic
+        shapes) when ``torch_compile_language_model`` is set.
+        """
+        compile_mode = self.settings.torch_compile_mode
+        is_cuda = str(self.device).startswith("cuda")
+        targets = [
+            (
+                "prediction_head",
+                self.model.model.prediction_head,
+                "reduce-overhead" if is_cuda else compile_mode,
+                not is_cuda,
+            ),
+        ]
+        if self.settings.torch_compile_language_model:
+            targets.append(
+                ("language_model", self.model.model.language_model, compile_mode, True)
+            )
+        for name, module, mode, dynamic in targets:
+            try:
+                module.compile(mode=mode, dynamic=dynamic)
+            except Exception as e:
+                if dynamic:
+                    print(
+                        f"torch.compile() failed for {name}: {e}, continuing without compilation"
+                    )
+                    continue
+                # Static capture is the fast path; dynamic shapes are the fallback
+                print(f"torch.compile() failed for {name}: {e}, retrying with dynamic=True")
+                mode, dynamic = compile_mode, True
+                try:
+                    module.compile(mode=mode, dynamic=dynamic)
+                except Exception as e:
+                    print(
+                        f"torch.compile() failed for {name}: {e}, continuing without compilation"
+                    )
+                    continue
+            print(
+                f"{name} compiled with torch.compile(mode='{mode}', dynamic={dynamic})"
+            )
+
     def _apply_quantization(self):
         """Apply quantization to the model based on settings."""
         quant_method = self.settings.vibevoice_quantization
+        on_cuda = torch.cuda.is_available() and next(self.model.parameters()).is_cuda
+        if on_cuda:
+            allocated_before = torch.cuda.memory_allocated() / 1024**3
 
         if quant_method == "int8_torchao":
             self._apply_torchao_quant(bits=8)
@@ -213,6 +267,21 @@ class TTSService:
             logger.warning(
                 f"Unknown quantization method: {quant_method}, skipping quantization"
             )
+            return
+
+        # Collect once after every layer is swapped, then hand the freed
+        # full-precision blocks back so they stop counting against VRAM
+        import gc
+
+        gc.collect()
+        if on_cuda:
+            torch.cuda.empty_cache()
+            torch.cuda.ipc_collect()
+            allocated_after = torch.cuda.memory_allocated() / 1024**3
+            logger.info(
+                f"VRAM allocated: {allocated_before:.2f} GB before quantization, "
+                f"{allocated_after:.2f} GB after"
+            )
 
     def _apply_torchao_quant(self, bits: int = 8):
         """
@@ -260,14 +329,33 @@ class TTSService:
         # Quantize only the language model (Qwen2 decoder) - this is the largest component
         # The audio components (acoustic_tokenizer, semantic_tokenizer, prediction_head, connectors)
         # are kept at full precision to maintain audio quality
+        # Small projections (e.g. GQA k/v) lose more to dequantization than
+        # they save in memory, so only large Linear layers are quantized
+        min_numel = self.settings.quantization_min_numel
+        skipped = []
+
+        def filter_fn(module, fqn):
+            if not isinstance(module, torch.nn.Linear):
+                return False
+            if module.weight.numel() < min_numel:
+                skipped.append(fqn or "lm_head")
+                return False
+            return True
+
         try:
             logger.info(
                 f"Quantizing language_model (Qwen2 decoder) with {quant_name}..."
             )
-            quantize_(self.model.model.language_model, quant_fn)
+            quantize_(self.model.model.language_model, quant_fn, filter_fn=filter_fn)
 
             logger.info(f"Quantizing lm_head with {quant_name}...")
-            quantize_(self.model.lm_head, quant_fn)
+            quantize_(self.model.lm_head, quant_fn, filter_fn=filter_fn)
+
+            if skipped:
+                logger.info(
+                    f"Kept {len(skipped)} Linear layers under {min_numel} weights "
+                    f"at full precision: {', '.join(skipped)}"
+                )
 
         except Exception as e:
             logger.error(f"Failed to quantize model: {e}")
@@ -276,11 +364,6 @@ class TTSService:
 
         logger.info(f"{quant_name} quantization applied successfully")
 
-        # Force garbage collection
-        import gc
-
-        gc.collect()
-
     def _apply_bnb_nf4_quant(self):
         """
         Apply BitsAndBytes NF4 quantization to the language model.
@@ -310,39 +393,70 @@ class TTSService:
             )
 
         # Quantize Linear layers in language model and lm_head
-        def replace_with_bnb_linear(module, name=""):
-            for attr_name in dir(module):
-                target_attr = getattr(module, attr_name)
-                if isinstance(target_attr, torch.nn.Linear):
-                    # Create NF4 quantized linear layer
-                    setattr(
-                        module,
-                        attr_name,
-                        bnb.nn.Linear4bit(
-                            target_attr.in_features,
-                            target_attr.out_features,
-                            bias=target_attr.bias is not None,
-                            compute_dtype=torch.bfloat16,
-                            compress_statistics=True,
-                            quant_type="nf4",
-                        ),
-                    )
-                    # Copy weights
-                    new_layer = getattr(module, attr_name)
-                    new_layer.weight.data = target_attr.weight.data
-                    if target_attr.bias is not None:
-                        new_layer.bias.data = target_attr.bias.data
-
-            # Recurse into child modules
-            for name, child in module.named_children():
-                replace_with_bnb_linear(child, name)
+        def replace_with_bnb_linear(parent, attr_name):
+            """Swap every nn.Linear under parent.<attr_name> (inclusive)."""
+            root = getattr(parent, attr_name)
+            # Snapshot names only: the walk must not see the layers it
+            # inserts, and holding module references would keep the
+            # replaced weights alive until the end of the walk
+            linear_names = [
+                name
+                for name, module in root.named_modules()
+                if isinstance(module, torch.nn.Linear)
+                and not isinstance(module, bnb.nn.Linear4bit)
+            ]
+            for name in linear_names:
+                module = root.get_submodule(name)
+                if name:
+                    owner_path, _, child_name = name.rpartition(".")
+                    owner = root.get_submodule(owner_path)
+                else:
+                    owner, child_name = parent, attr_name
+
+                # Create the NF4 layer on the meta device so no second
+                # full-precision weight buffer is allocated alongside the
+                # original one
+                new_layer = bnb.nn.Linear4bit(
+                    module.in_features,
+                    module.out_features,
+                    bias=module.bias is not None,
+                    compute_dtype=torch.bfloat16,
+                    compress_statistics=True,
+                    quant_type="nf4",
+                    device="meta",
+                )
+                # Adopt the existing weight; Params4bit quantizes it when
+                # moved to CUDA (a no-op move for CPU models)
+                device = module.weight.device
+                new_layer.weight = bnb.nn.Params4bit(
+                    module.weight.data,
+                    requires_grad=False,
+                    compress_statistics=True,
+                    quant_type="nf4",
+                ).to(device)
+                if module.bias is not None:
+                    new_layer.bias = module.bias
+                setattr(owner, child_name, new_layer)
+                # Drop the last reference so the full-precision weight is
+                # freed before the next layer is quantized
+                del module
 
         try:
             logger.info("Quantizing language_model (Qwen2 decoder) with NF4...")
-            replace_with_bnb_linear(self.model.model.language_model)
-
-            logger.info("Quantizing lm_head with NF4...")
-            replace_with_bnb_linear(self.model.lm_head)
+            with torch.no_grad():
+                replace_with_bnb_linear(self.model.model, "language_model")
+
+            # A tied lm_head shares the embedding matrix, which must stay
+            # full precision for the input lookup
+            if (
+                self.model.lm_head.weight
+                is self.model.get_input_embeddings().weight
+            ):
+                logger.info("lm_head is tied to the input embeddings; skipping NF4")
+            else:
+                logger.info("Quantizing lm_head with NF4...")
+                with torch.no_grad():
+                    replace_with_bnb_linear(self.model, "lm_head")
 
         except Exception as e:
             logger.error(f"Failed to quantize model with NF4: {e}")
@@ -351,10 +465,47 @@ class TTSService:
 
         logger.info("NF4 quantization applied successfully")
 
-        # Force garbage collection
-        import gc
+    def warmup(self, runs: int = 1, sample_rate: int = 24000):
+        """
+        Run short generations to trigger CUDA lazy init and kernel autotuning.
 
-        gc.collect()
+        Without this the first real request pays for cuDNN/flash-attn setup
+        (and torch.compile capture, when enabled). A second run lets the
+        caching allocator reach steady state.
+
+        Args:
+            runs: Number of warmup generations
+            sample_rate: Sample rate of the dummy voice prompt
+        """
+        if not self._model_loaded:
+            raise RuntimeError("Model not loaded. Call load_model() first.")
+
+        # One second of a quiet tone; silence would trip the dB normalizer
+        t = np.arange(sample_rate, dtype=np.float32) / sample_rate
+        dummy_voice = 0.1 * np.sin(2 * np.pi * 220.0 * t, dtype=np.float32)
+
+        # Token budget is capped: the point is to hit every kernel once, not
+        # to produce usable audio
+        script = self.format_script_for_single_speaker("Hi.")
+        for _ in range(runs):
+            try:
+                self.generate_speech(
+                    text=script,
+                    voice_samples=[dummy_voice],
+                    cfg_scale=self.settings.default_cfg_scale,
+                    stream=False,
+                    max_new_tokens=32,
+                )
+            except RuntimeError as e:
+                # The capped run may end before any speech token; that's fine
+                if "No audio generated" not in str(e):
+                    raise
+                logger.debug("Warmup generation produced no audio")
+
+        if str(self.device).startswith("cuda"):
+            # Make sure queued kernels finished before we report ready. The
+            # cached blocks are kept on purpose (allocator steady state).
+            torch.cuda.synchronize()
 
     @property
     def is_loaded(self) -> bool:
@@ -369,6 +520,9 @@ class TTSService:
         inference_steps: Optional[int] = None,
         seed: Optional[int] = None,
         stream: bool = False,
+        max_new_tokens: Optional[int] = None,
+        cancel: Optional[threading.Event] = None,
+        on_done: Optional[Callable[[], None]] = None,
     ) -> Union[np.ndarray, Iterator[np.ndarray]]:
         """
         Generate speech from text.
@@ -380,6 +534,10 @@ class TTSService:
             inference_steps: Number of diffusion steps (None = use default)
             seed: Random seed for reproducibility
             stream: Whether to return streaming iterator
+            max_new_tokens: Cap on generated tokens (None = until end of script)
+            cancel: Streaming only; setting it stops generation at the next step
+            on_done: Streaming only; called from the worker thread once the
+                model has stopped, however generation ended
 
         Returns:
             Generated audio array or iterator of audio chunks
@@ -391,38 +549,20 @@ class TTSService:
         if seed is not None:
             set_seed(seed)
 
-        # Set inference steps if provided
-        if inference_steps is not None:
-            self.model.set_ddpm_inference_steps(num_steps=inference_steps)
-
-        # Process inputs
-        inputs = self.processor(
-            text=[text],
-            voice_samples=[voice_samples],
-            padding=True,
-            return_tensors="pt",
-            return_attention_mask=True,
-        )
-
-        # Move to device
-        target_device = (
-            self.device
-            if str(self.device).startswith("cuda") or self.device == "mps"
-            else "cpu"
-        )
-        for k, v in inputs.items():
-            if torch.is_tensor(v):
-                inputs[k] = v.to(target_device)
+        self._set_inference_steps(inference_steps)
+        inputs = self._prepare_inputs([text], [voice_samples])
 
         if stream:
             # Return streaming iterator
-            return self._generate_streaming(inputs, cfg_scale)
+            return self._generate_streaming(
+                inputs, cfg_scale, max_new_tokens, cancel=cancel, on_done=on_done
+            )
         else:
             # Generate all at once
-            with torch.no_grad():
+            with torch.inference_mode():
                 outputs = self.model.generate(
                     **inputs,
-                    max_new_tokens=None,
+                    max_new_tokens=max_new_tokens,
                     cfg_scale=cfg_scale,
                     tokenizer=self.processor.tokenizer,
                     generation_config={"do_sample": False},
@@ -436,63 +576,315 @@ class TTSService:
             if outputs.speech_outputs and outputs.speech_outputs[0] is not None:
                 audio = outputs.speech_outputs[0]
                 if torch.is_tensor(audio):
-                    # Convert bfloat16 to float32 before converting to numpy
-                    if audio.dtype == torch.bfloat16:
-                        audio = audio.float()
-                    audio = audio.cpu().numpy()
+                    audio = self._tensor_to_numpy(audio)
                 return audio
             else:
                 raise RuntimeError("No audio generated")
 
+    def generate_speech_batch(
+        self,
+        texts: List[str],
+        voice_samples_list: List[List[np.ndarray]],
+        cfg_scale: float = 1.3,
+        inference_steps: Optional[int] = None,
+        max_new_tokens: Optional[int] = None,
+    ) -> List[np.ndarray]:
+        """
+        Generate speech for several scripts in one batched model call.
+
+        All scripts share the CFG scale and diffusion step count; unseeded
+        only, since one RNG stream drives the whole batch.
+
+        Args:
+            texts: Input texts (formatted with Speaker labels)
+            voice_samples_list: Voice sample arrays for each text
+            cfg_scale: Classifier-free guidance scale
+            inference_steps: Number of diffusion steps (None = use default)
+            max_new_tokens: Cap on generated tokens (None = until end of script)
+
+        Returns:
+            Generated audio array for each text, in order
+        """
+        if not self._model_loaded:
+            raise RuntimeError("Model not loaded. Call load_model() first.")
+
+        self._set_inference_steps(inference_steps)
+        inputs = self._prepare_inputs(texts, voice_samples_list)
+
+        with torch.inference_mode():
+            outputs = self.model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                cfg_scale=cfg_scale,
+                tokenizer=self.processor.tokenizer,
+                generation_config={"do_sample": False},
+                return_speech=True,
+                verbose=False,
+                refresh_negative=True,
+                show_progress_bar=False,
+            )
+
+        speech_outputs = outputs.speech_outputs or []
+        if len(speech_outputs) != len(texts) or any(a is None for a in speech_outputs):
+            raise RuntimeError("No audio generated")
+        return [
+            self._tensor_to_numpy(audio) if torch.is_tensor(audio) else audio
+            for audio in speech_outputs
+        ]
+
+    def _set_inference_steps(self, inference_steps: Optional[int]):
+        """Set the diffusion step count, skipping the call when unchanged."""
+        # The scheduler keeps its setting between calls, so only reconfigure
+        # it when the value changes
+        if (
+            inference_steps is not None
+            and inference_steps != self._current_inference_steps
+        ):
+            self.model.set_ddpm_inference_steps(num_steps=inference_steps)
+            self._current_inference_steps = inference_steps
+
+    def _prepare_inputs(
+        self, texts: List[str], voice_samples_list: List[List[np.ndarray]]
+    ) -> dict:
+        """
+        Run the processor and move its outputs to the model device.
+
+        Args:
+            texts: Input texts (formatted with Speaker labels)
+            voice_samples_list: Voice sample arrays for each text
+
+        Returns:
+            Model inputs on the target device
+        """
+        # Process inputs
+        inputs = self.processor(
+            text=texts,
+            voice_samples=voice_samples_list,
+            padding=True,
+            return_tensors="pt",
+            return_attention_mask=True,
+        )
+
+        # Move to device
+        target_device = (
+            self.device
+            if str(self.device).startswith("cuda") or self.device == "mps"
+            else "cpu"
+        )
+        if self._copy_stream is not None and str(target_device).startswith("cuda"):
+            return self._stage_inputs_cuda(inputs, target_device)
+        return {
+            k: (v.to(target_device) if torch.is_tensor(v) else v)
+            for k, v in inputs.items()
+        }
+
+    def _stage_inputs_cuda(self, inputs: dict, device: str) -> dict:
+        """
+        Copy processor outputs to the GPU on the side copy stream.
+
+        CPU tensors are packed per dtype into one pinned staging buffer, so
+        the whole input set crosses PCIe in one asynchronous copy per dtype
+        (token ids, masks, voice audio) rather than one per tensor; the
+        packing replaces the copy ``pin_memory()`` would make anyway. Pinned
+        buffers come from torch's caching host allocator, which reuses them
+        once their copies complete. The compute stream then waits on the copy
+        stream before generate().
+
+        Args:
+            inputs: Processed model inputs
+            device: Target CUDA device
+
+        Returns:
+            Inputs with every tensor on ``device``
+        """
+        compute_stream = torch.cuda.current_stream(device)
+        staged = dict(inputs)
+        groups: Dict[torch.dtype, List[str]] = {}
+        for k, v in inputs.items():
+            if torch.is_tensor(v):
+                if v.device.type == "cpu":
+                    groups.setdefault(v.dtype, []).append(k)
+                else:
+                    staged[k] = v.to(device, non_blocking=True)
+
+        with torch.cuda.stream(self._copy_stream):
+            for dtype, keys in groups.items():
+                total = sum(inputs[k].numel() for k in keys)
+                host = torch.empty(total, dtype=dtype, pin_memory=True)
+                offset = 0
+                for k in keys:
+                    n = inputs[k].numel()
+                    host[offset : offset + n].copy_(inputs[k].reshape(-1))
+                    offset += n
+
+                packed = host.to(device, non_blocking=True)
+                # Allocated on the copy stream but consumed on the compute
+                # stream; keep the allocator from recycling it too early
+                packed.record_stream(compute_stream)
+
+                offset = 0
+                for k in keys:
+                    n = inputs[k].numel()
+                    staged[k] = packed[offset : offset + n].view(inputs[k].shape)
+                    offset += n
+
+        compute_stream.wait_stream(self._copy_stream)
+        return staged
+
+    @staticmethod
+    def _tensor_to_numpy(audio: torch.Tensor) -> np.ndarray:
+        """
+        Copy an audio tensor to host memory as float32 numpy.
+
+        The device-to-host copy carries the model's native dtype and the
+        float32 upcast (numpy has no bfloat16) runs on the CPU afterwards, so
+        half-precision outputs move half the bytes and need no full-precision
+        scratch tensor on the GPU.
+        """
+        audio = audio.detach().cpu()
+        if audio.dtype != torch.float32:
+            audio = audio.to(torch.float32)
+        return audio.numpy()
+
     def _generate_streaming(
-        self, inputs: dict, cfg_scale: float
+        self,
+        inputs: dict,
+        cfg_scale: float,
+        max_new_tokens: Optional[int] = None,
+        cancel: Optional[threading.Event] = None,
+        on_done: Optional[Callable[[], None]] = None,
     ) -> Iterator[np.ndarray]:
         """
-        Generate speech with streaming.
+        Start a streaming generation and return its chunk iterator.
+
+        Generation is submitted before this returns, so ``on_done`` always
+        fires even if the iterator is never consumed.
 
         Args:
             inputs: Processed model inputs
             cfg_scale: CFG scale
+            max_new_tokens: Cap on generated tokens (None = until end of script)
+            cancel: Event that stops generation at the next step once set
+            on_done: Called from the worker thread when generation has stopped
 
-        Yields:
-            Audio chunks as numpy arrays
+        Returns:
+            Iterator of audio chunks as numpy arrays
         """
         # Create audio streamer
         audio_streamer = AudioStreamer(batch_size=1, stop_signal=None, timeout=None)
+        if cancel is None:
+            cancel = threading.Event()
 
         # Start generation in background
-        import threading
-
         def generate():
-            with torch.no_grad():
-                self.model.generate(
-                    **inputs,
-                    max_new_tokens=None,
-                    cfg_scale=cfg_scale,
-                    tokenizer=self.processor.tokenizer,
-                    generation_config={"do_sample": False},
-                    audio_streamer=audio_streamer,
-                    return_speech=True,
-                    verbose=False,
-                    refresh_negative=True,
-                    show_progress_bar=False,
-                )
+            try:
+                with torch.inference_mode():
+                    self.model.generate(
+                        **inputs,
+                        max_new_tokens=max_new_tokens,
+                        cfg_scale=cfg_scale,
+                        tokenizer=self.processor.tokenizer,
+                        generation_config={"do_sample": False},
+                        audio_streamer=audio_streamer,
+                        return_speech=True,
+                        verbose=False,
+                        refresh_negative=True,
+                        show_progress_bar=False,
+                        stop_check_fn=cancel.is_set,
+                    )
+            finally:
+                # Unblock the consumer however generation ended; errors are
+                # re-raised via the future
+                audio_streamer.end()
 
-        generation_thread = threading.Thread(target=generate)
-        generation_thread.start()
+        generation_future = self._stream_executor.submit(generate)
+        if on_done is not None:
+            generation_future.add_done_callback(lambda _: on_done())
 
-        # Yield chunks as they arrive
-        audio_stream = audio_streamer.get_stream(0)
-        for chunk in audio_stream:
-            if torch.is_tensor(chunk):
-                # Convert bfloat16 to float32 before converting to numpy
-                if chunk.dtype == torch.bfloat16:
-                    chunk = chunk.float()
-                chunk = chunk.cpu().numpy()
-            yield chunk
+        return self._iter_stream(audio_streamer, generation_future, cancel)
 
-        # Wait for generation to complete
-        generation_thread.join(timeout=10.0)
+    def _iter_stream(
+        self,
+        audio_streamer: AudioStreamer,
+        generation_future: Future,
+        cancel: threading.Event,
+    ) -> Iterator[np.ndarray]:
+        """
+        Yield streamed chunks as numpy arrays.
+
+        Closing the iterator early cancels generation and waits (bounded)
+        for the model to stop.
+
+        Args:
+            audio_streamer: Streamer the generation writes to
+            generation_future: Future of the running generation
+            cancel: Event polled by the model between steps
+
+        Yields:
+            Audio chunks as numpy arrays
+        """
+        finished = False
+        try:
+            for chunk in audio_streamer.get_stream(0):
+                if torch.is_tensor(chunk):
+                    if chunk.is_cuda:
+                        chunk = self._cuda_chunk_to_numpy(chunk)
+                    else:
+                        chunk = self._tensor_to_numpy(chunk)
+                yield chunk
+            finished = True
+        finally:
+            if not finished:
+                # Consumer went away (e.g. client disconnect): stop the model
+                # instead of letting it run to the end of the script
+                cancel.set()
+
+            # Wait for generation to stop, surfacing any generation error
+            # on a normal finish
+            try:
+                generation_future.result(timeout=10.0)
+            except FutureTimeoutError:
+                logger.warning("Streaming generation still running after stream ended")
+            except Exception:
+                if finished:
+                    raise
+                logger.debug("Cancelled streaming generation failed", exc_info=True)
+
+    def _cuda_chunk_to_numpy(self, chunk: torch.Tensor) -> np.ndarray:
+        """
+        Copy a streamed GPU chunk to numpy through a reused pinned buffer.
+
+        Chunks are consumed from whichever executor thread pulls the next
+        item, so buffers are kept per thread and grown as needed instead of
+        allocating fresh pageable memory for every chunk.
+
+        Args:
+            chunk: Audio chunk on a CUDA device
+
+        Returns:
+            Float32 audio chunk with the same shape
+        """
+        chunk = chunk.detach()
+        n = chunk.numel()
+        buffers = getattr(self._chunk_buffers, "by_dtype", None)
+        if buffers is None:
+            buffers = self._chunk_buffers.by_dtype = {}
+        buf = buffers.get(chunk.dtype)
+        if buf is None or buf.numel() < n:
+            buf = torch.empty(max(n, 1 << 14), dtype=chunk.dtype, pin_memory=True)
+            buffers[chunk.dtype] = buf
+
+        staged = buf[:n]
+        staged.copy_(chunk.reshape(-1), non_blocking=True)
+        torch.cuda.current_stream(chunk.device).synchronize()
+
+        # The buffer is reused for the next chunk, so hand out a copy; for
+        # half-precision chunks the float32 upcast makes that copy
+        if chunk.dtype == torch.float32:
+            out = staged.clone()
+        else:
+            out = staged.to(torch.float32)
+        return out.numpy().reshape(chunk.shape)
 
     def format_script_for_single_speaker(self, text: str, speaker_id: int = 0) -> str:
         """
@@ -505,13 +897,10 @@ class TTSService:
         Returns:
             Formatted script
         """
-        # Split into sentences/paragraphs
-        lines = text.strip().split("\n")
-        formatted_lines = []
-
-        for line in lines:
-            line = line.strip()
-            if line:
-                formatted_lines.append(f"Speaker {speaker_id}: {line}")
-
-        return "\n".join(formatted_lines)
+        # One "Speaker N:" line per non-empty paragraph, in a single pass
+        prefix = f"Speaker {speaker_id}: "
+        return "\n".join(
+            prefix + line
+            for line in (raw.strip() for raw in text.splitlines())
+            if line
+        )
@@ -2,35 +2,77 @@
 
 import os
 import json
-from typing import Dict, List, Optional
+import functools
+import hashlib
+import mmap
+import struct
+import threading
+from typing import Dict, List, Optional, Tuple, Union
 import numpy as np
 import soundfile as sf
-import librosa
 from pathlib import Path
 from pydub import AudioSegment
-import io
+
+from api.utils.audio_utils import downmix_to_mono, resample_audio
+
+try:
+    import av
+except ImportError:
+    av = None
+
+# numpy dtype for each pydub sample width (bytes); 8-bit PCM is unsigned but
+# pydub normalizes segments to signed samples
+_PCM_DTYPES = {1: np.int8, 2: np.int16, 4: np.int32}
 
 
 class VoiceManager:
     """Manages voice presets and maps OpenAI voices to VibeVoice presets."""
 
+    # Supported audio extensions (lowercase, without the dot)
+    AUDIO_EXTENSIONS = frozenset({"wav", "mp3", "flac", "ogg", "m4a", "aac"})
+
+    # Voice name prefix -> language, for the voice listings
+    _LANGUAGE_PREFIXES = {
+        "en-": "English",
+        "zh-": "Chinese",
+        "es-": "Spanish",
+        "in-": "Indian English",
+    }
+
     def __init__(
         self,
         voices_dir: str = "demo/voices",
-        openai_voice_mapping: Optional[str] = None,
+        openai_voice_mapping: Optional[Union[Dict[str, str], str]] = None,
+        cache_dir: Optional[str] = None,
     ):
         """
         Initialize voice manager.
 
         Args:
             voices_dir: Directory containing voice preset files
-            openai_voice_mapping: JSON string mapping OpenAI voice names to VibeVoice preset names
+            openai_voice_mapping: Mapping (or JSON string) of OpenAI voice names to VibeVoice preset names
+            cache_dir: Directory for pre-resampled .npy copies (None = disabled)
         """
         self.voices_dir = Path(voices_dir)
+        self.cache_dir = Path(cache_dir) if cache_dir else None
         self.voice_presets: Dict[str, str] = {}
-
-        # Parse OpenAI voice mapping from JSON string
-        if openai_voice_mapping:
+        # Decoded + resampled preset audio keyed by (file path, sample rate)
+        self._audio_cache: Dict[Tuple[str, int], np.ndarray] = {}
+        # One lock per cache key so concurrent requests (and the startup
+        # preload) decode each file only once
+        self._decode_locks: Dict[Tuple[str, int], threading.Lock] = {}
+        self._decode_locks_guard = threading.Lock()
+        # Any accepted voice name (OpenAI alias or preset) -> file path
+        self._resolver: Dict[str, str] = {}
+        # Voice listings, rebuilt whenever presets are rescanned
+        self._voice_list: Tuple[Dict[str, str], ...] = ()
+        self._openai_voice_list: Tuple[Dict[str, str], ...] = ()
+        self._openai_voice_entries: Tuple[Dict[str, str], ...] = ()
+
+        # Settings already parses the mapping; JSON strings are still accepted
+        if isinstance(openai_voice_mapping, dict):
+            self.OPENAI_VOICE_MAPPING = dict(openai_voice_mapping)
+        elif openai_voice_mapping:
             try:
                 self.OPENAI_VOICE_MAPPING = json.loads(openai_voice_mapping)
             except json.JSONDecodeError as e:
@@ -61,20 +103,93 @@ class VoiceManager:
             print(f"Warning: Voices directory not found at {self.voices_dir}")
             return
 
-        # Supported audio extensions
-        audio_extensions = {".wav", ".mp3", ".flac", ".ogg", ".m4a", ".aac"}
+        self._audio_cache.clear()
+        self.__dict__.pop("preset_names", None)
 
-        # Scan directory for audio files
-        for file_path in self.voices_dir.iterdir():
-            if file_path.is_file() and file_path.suffix.lower() in audio_extensions:
-                # Use filename without extension as preset name
-                preset_name = file_path.stem
-                self.voice_presets[preset_name] = str(file_path)
+        # Scan directory for audio files; DirEntry.is_file() uses the type
+        # from the directory listing, so only symlinked presets need a stat
+        with os.scandir(self.voices_dir) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                name, dot, ext = entry.name.rpartition(".")
+                if dot and name and ext.lower() in self.AUDIO_EXTENSIONS:
+                    # Use filename without extension as preset name
+                    self.voice_presets[name] = entry.path
+
+        self._build_resolver()
+        self._build_voice_lists()
 
         print(f"Loaded {len(self.voice_presets)} voice presets from {self.voices_dir}")
         if self.voice_presets:
             print(f"Available voices: {', '.join(sorted(self.voice_presets.keys()))}")
 
+    def _build_resolver(self):
+        """Precompute name -> path lookups for OpenAI aliases and presets."""
+        # OpenAI aliases win over a preset of the same name, as in get_voice_path
+        self._resolver = dict(self.voice_presets)
+        for openai_name, preset in self.OPENAI_VOICE_MAPPING.items():
+            if preset in self.voice_presets:
+                self._resolver[openai_name] = self.voice_presets[preset]
+
+    def _build_voice_lists(self):
+        """
+        Precompute the voice listings served by the voices endpoints.
+
+        The entry dicts are built once per preset scan and shared by every
+        listing call; treat them as read-only.
+        """
+        self._voice_list = tuple(
+            {"name": name, "path": path, "language": self._guess_language(name)}
+            for name, path in sorted(self.voice_presets.items())
+        )
+        self._openai_voice_list = tuple(
+            {
+                "name": openai_name,
+                "vibevoice_preset": vibevoice_preset,
+                "available": vibevoice_preset in self.voice_presets,
+            }
+            for openai_name, vibevoice_preset in self.OPENAI_VOICE_MAPPING.items()
+        )
+
+        # OpenAI /v1/audio/voices format: mapped OpenAI voices whose preset
+        # exists, then every preset that isn't the target of a mapping
+        mapped_presets = set(self.OPENAI_VOICE_MAPPING.values())
+        self._openai_voice_entries = tuple(
+            [
+                {"id": openai_name, "object": "voice", "name": openai_name}
+                for openai_name, vibevoice_preset in self.OPENAI_VOICE_MAPPING.items()
+                if vibevoice_preset in self.voice_presets
+            ]
+            + [
+                {"id": voice["name"], "object": "voice", "name": voice["name"]}
+                for voice in self._voice_list
+                if voice["name"] not in mapped_presets
+            ]
+        )
+
+    @functools.cached_property
+    def openai_voice_names(self) -> str:
+        """Comma-separated OpenAI voice names, for error messages."""
+        return ", ".join(self.OPENAI_VOICE_MAPPING)
+
+    @functools.cached_property
+    def preset_names(self) -> str:
+        """Comma-separated sorted preset names, for error messages."""
+        return ", ".join(sorted(self.voice_presets.keys()))
+
+    def resolve_voice(self, voice_name: str) -> Optional[str]:
+        """
+        Resolve an OpenAI voice name or preset name to a voice file path.
+
+        Args:
+            voice_name: OpenAI voice name or VibeVoice preset name
+
+        Returns:
+            Path to voice file, or None if not found
+        """
+        return self._resolver.get(voice_name)
+
     def get_voice_path(
         self, voice_name: str, is_openai_voice: bool = False
     ) -> Optional[str]:
@@ -100,6 +215,12 @@ class VoiceManager:
         """
         Load voice audio from preset.
 
+        Decoded audio is cached per file and sample rate, so repeated requests
+        for the same voice skip the disk read and resample. When a cache
+        directory is configured, a resampled .npy copy is also written there
+        so later cold starts skip decoding. The returned array is shared and
+        read-only.
+
         Args:
             voice_name: Name of voice
             is_openai_voice: Whether this is an OpenAI voice name
@@ -113,98 +234,284 @@ class VoiceManager:
         if not voice_path:
             return None
 
+        return self._load_voice_file(voice_path, target_sr)
+
+    def load_resolved_voice_audio(
+        self, voice_name: str, target_sr: int = 24000
+    ) -> Optional[np.ndarray]:
+        """
+        Load voice audio by OpenAI voice name or preset name in one lookup.
+
+        Args:
+            voice_name: OpenAI voice name or VibeVoice preset name
+            target_sr: Target sample rate
+
+        Returns:
+            Audio array, or None if voice not found
+        """
+        voice_path = self.resolve_voice(voice_name)
+
+        if not voice_path:
+            return None
+
+        return self._load_voice_file(voice_path, target_sr)
+
+    def _load_voice_file(self, voice_path: str, target_sr: int) -> Optional[np.ndarray]:
+        """Return cached audio for a voice file, decoding it on first use."""
+        cache_key = (voice_path, target_sr)
+        cached = self._audio_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        with self._decode_locks_guard:
+            lock = self._decode_locks.setdefault(cache_key, threading.Lock())
+
+        with lock:
+            # Another thread may have decoded it while we waited
+            cached = self._audio_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+            wav = None
+            if self.cache_dir is not None:
+                wav = self._load_sidecar(voice_path, target_sr)
+            if wav is None:
+                wav = self._decode_voice_file(voice_path, target_sr)
+                if wav is None:
+                    return None
+                if self.cache_dir is not None:
+                    self._save_sidecar(voice_path, target_sr, wav)
+
+            # Shared across requests, so guard against in-place modification
+            wav.setflags(write=False)
+            self._audio_cache[cache_key] = wav
+            return wav
+
+    def _sidecar_path(self, voice_path: str, target_sr: int) -> Path:
+        """Path of the pre-resampled .npy copy of a voice file in the cache dir."""
+        # Hash the full path so same-named presets from different
+        # directories don't collide
+        digest = hashlib.sha1(os.path.abspath(voice_path).encode()).hexdigest()[:12]
+        return self.cache_dir / f"{Path(voice_path).stem}-{digest}.{target_sr}.npy"
+
+    def _load_sidecar(self, voice_path: str, target_sr: int) -> Optional[np.ndarray]:
+        """
+        Load pre-resampled audio saved by an earlier run, if still current.
+
+        Args:
+            voice_path: Path to the source audio file
+            target_sr: Target sample rate
+
+        Returns:
+            Read-only float32 audio, or None if no usable sidecar exists
+        """
+        sidecar = self._sidecar_path(voice_path, target_sr)
+        try:
+            # Ignore sidecars older than the voice file they were made from
+            if os.stat(sidecar).st_mtime < os.stat(voice_path).st_mtime:
+                return None
+            wav = np.load(sidecar, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        return np.ascontiguousarray(wav, dtype=np.float32)
+
+    def _save_sidecar(self, voice_path: str, target_sr: int, wav: np.ndarray):
+        """Best-effort save of resampled audio so cold starts skip decoding."""
+        sidecar = self._sidecar_path(voice_path, target_sr)
+        tmp_path = f"{sidecar}.{os.getpid()}.tmp"
         try:
-            # Check if file format needs pydub (m4a, aac, mp3)
-            file_ext = Path(voice_path).suffix.lower()
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                np.save(f, wav)
+            # Atomic rename so other workers never read a partial file
+            os.replace(tmp_path, sidecar)
+        except OSError as e:
+            # Unwritable cache dir; keep the in-memory cache only
+            print(f"Warning: Could not write voice cache {sidecar}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
 
-            if file_ext in [".m4a", ".aac", ".mp3"]:
-                # Use pydub for these formats
-                audio_segment = AudioSegment.from_file(voice_path)
+    def preload_voices(self, target_sr: int = 24000) -> int:
+        """
+        Decode every preset into the audio cache ahead of the first request.
 
-                # Convert to mono if needed
-                if audio_segment.channels > 1:
-                    audio_segment = audio_segment.set_channels(1)
+        Args:
+            target_sr: Target sample rate
 
-                # Get sample rate
-                sr = audio_segment.frame_rate
+        Returns:
+            Number of presets loaded successfully
+        """
+        loaded = 0
+        for voice_path in self.voice_presets.values():
+            if self._load_voice_file(voice_path, target_sr) is not None:
+                loaded += 1
+        return loaded
 
-                # Convert to numpy array (normalized to [-1, 1])
-                samples = np.array(
-                    audio_segment.get_array_of_samples(), dtype=np.float32
-                )
-                wav = samples / (2**15)  # Normalize 16-bit PCM to [-1, 1]
+    @staticmethod
+    def _decode_voice_file(voice_path: str, target_sr: int) -> Optional[np.ndarray]:
+        """
+        Decode a voice file to mono float32 at the target sample rate.
+
+        Args:
+            voice_path: Path to audio file
+            target_sr: Target sample rate
 
-            else:
-                # Use soundfile for wav, flac, ogg
-                wav, sr = sf.read(voice_path)
+        Returns:
+            Audio array, or None if decoding failed
+        """
+        try:
+            # 16-bit mono WAV already at the target rate needs no decoder
+            wav = VoiceManager._read_pcm16_wav(voice_path, target_sr)
+            if wav is not None:
+                return wav
+
+            try:
+                # libsndfile decodes wav, flac, ogg and (1.1+) mp3 in-process;
+                # decode straight to float32 rather than the float64 default
+                with sf.SoundFile(voice_path) as f:
+                    sr = f.samplerate
+                    wav = f.read(dtype="float32")
 
                 # Convert stereo to mono if needed
-                if len(wav.shape) > 1:
-                    wav = np.mean(wav, axis=1)
+                wav = downmix_to_mono(wav)
+            except RuntimeError:
+                # m4a/aac (and mp3 on older libsndfile builds)
+                wav, sr = VoiceManager._decode_compressed(voice_path)
 
             # Resample if needed
             if sr != target_sr:
-                wav = librosa.resample(wav, orig_sr=sr, target_sr=target_sr)
+                wav = resample_audio(wav, sr, target_sr)
 
-            return wav.astype(np.float32)
+            return wav.astype(np.float32, copy=False)
 
         except Exception as e:
-            print(f"Error loading voice {voice_name} from {voice_path}: {e}")
+            print(f"Error loading voice from {voice_path}: {e}")
             return None
 
-    def list_available_voices(self) -> List[Dict[str, str]]:
+    @staticmethod
+    def _read_pcm16_wav(voice_path: str, target_sr: int) -> Optional[np.ndarray]:
         """
-        Get list of available voice presets.
+        Convert a mono 16-bit PCM WAV at the target rate straight from mmap.
+
+        The samples are viewed in place with np.frombuffer and scaled to
+        float32 in one pass, skipping libsndfile's intermediate buffer.
+
+        Args:
+            voice_path: Path to audio file
+            target_sr: Target sample rate
 
         Returns:
-            List of voice information dictionaries
+            Audio array, or None if the file needs the general decoder
         """
-        voices = []
-        for name, path in sorted(self.voice_presets.items()):
-            voices.append(
-                {"name": name, "path": path, "language": self._guess_language(name)}
-            )
-        return voices
+        if not voice_path.lower().endswith(".wav"):
+            return None
+        try:
+            info = sf.info(voice_path)
+        except RuntimeError:
+            return None
+        if (
+            info.format != "WAV"
+            or info.subtype != "PCM_16"
+            or info.channels != 1
+            or info.samplerate != target_sr
+        ):
+            return None
 
-    def list_openai_voices(self) -> List[Dict[str, str]]:
+        with open(voice_path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # Walk the RIFF chunks to the start of the sample data
+                offset = 12
+                while offset + 8 <= len(mm):
+                    chunk_id, size = struct.unpack_from("<4sI", mm, offset)
+                    offset += 8
+                    if chunk_id == b"data":
+                        break
+                    offset += size + (size & 1)
+                else:
+                    return None
+
+                # Trust the header's frame count only as far as the file goes
+                count = min(info.frames, (len(mm) - offset) // 2)
+                samples = np.frombuffer(mm, dtype="<i2", count=count, offset=offset)
+                wav = samples.astype(np.float32)
+                # Release the view before the mapping is closed
+                del samples
+        wav *= np.float32(1.0 / 32768.0)
+        return wav
+
+    @staticmethod
+    def _decode_compressed(voice_path: str) -> Tuple[np.ndarray, int]:
         """
-        Get list of OpenAI-compatible voices.
+        Decode a format libsndfile cannot read to mono float32.
+
+        Uses PyAV (in-process libav) when installed, otherwise pydub, which
+        shells out to ffmpeg.
+
+        Args:
+            voice_path: Path to audio file
 
         Returns:
-            List of OpenAI voice information
-        """
-        voices = []
-        for openai_name, vibevoice_preset in self.OPENAI_VOICE_MAPPING.items():
-            if vibevoice_preset in self.voice_presets:
-                voices.append(
-                    {
-                        "name": openai_name,
-                        "vibevoice_preset": vibevoice_preset,
-                        "available": True,
-                    }
-                )
-            else:
-                voices.append(
-                    {
-                        "name": openai_name,
-                        "vibevoice_preset": vibevoice_preset,
-                        "available": False,
-                    }
-                )
-        return voices
+            Tuple of (audio array, sample rate)
+        """
+        if av is not None:
+            with av.open(voice_path) as container:
+                stream = container.streams.audio[0]
+                sr = stream.codec_context.sample_rate
+                # Let libav downmix and convert to packed float32
+                resampler = av.AudioResampler(format="flt", layout="mono", rate=sr)
+                chunks = []
+                for frame in container.decode(stream):
+                    for out in resampler.resample(frame):
+                        chunks.append(out.to_ndarray().reshape(-1))
+                for out in resampler.resample(None):
+                    chunks.append(out.to_ndarray().reshape(-1))
+            wav = np.concatenate(chunks) if chunks else np.zeros(0, np.float32)
+            return wav, sr
+
+        audio_segment = AudioSegment.from_file(voice_path)
+
+        # View the raw PCM bytes directly and scale to [-1, 1] in one pass,
+        # rather than iterating get_array_of_samples()
+        width = audio_segment.sample_width
+        samples = np.frombuffer(audio_segment.raw_data, dtype=_PCM_DTYPES[width])
+        channels = audio_segment.channels
+
+        # Mix down before the float cast, instead of set_channels(1), which
+        # re-mixes the segment in pure Python
+        if channels == 2:
+            # Overflow-free integer average: (a >> 1) + (b >> 1) + (a & b & 1)
+            frames = samples.reshape(-1, 2)
+            left, right = frames[:, 0], frames[:, 1]
+            mixed = left >> 1
+            mixed += right >> 1
+            mixed += left & right & 1
+            samples = mixed
+
+        wav = samples.astype(np.float32)
+        wav *= np.float32(1.0 / (1 << (8 * width - 1)))
+
+        if channels > 2:
+            wav = wav.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+
+        return wav, audio_segment.frame_rate
+
+    def list_available_voices(self) -> List[Dict[str, str]]:
+        """Get list of available voice presets."""
+        return list(self._voice_list)
+
+    def list_openai_voices(self) -> List[Dict[str, str]]:
+        """Get list of OpenAI-compatible voices."""
+        return list(self._openai_voice_list)
+
+    def list_openai_voice_entries(self) -> List[Dict[str, str]]:
+        """Get voices in the OpenAI ``/v1/audio/voices`` list format."""
+        return list(self._openai_voice_entries)
 
     def _guess_language(self, voice_name: str) -> str:
         """Guess language from voice name prefix."""
-        if voice_name.startswith("en-"):
-            return "English"
-        elif voice_name.startswith("zh-"):
-            return "Chinese"
-        elif voice_name.startswith("es-"):
-            return "Spanish"
-        elif voice_name.startswith("in-"):
-            return "Indian English"
-        else:
-            return "Unknown"
+        return self._LANGUAGE_PREFIXES.get(voice_name[:3], "Unknown")
 
     def get_default_voice(self) -> Optional[str]:
         """Get a default voice preset name."""
@@ -1,9 +1,14 @@
 """Audio format conversion and processing utilities."""
 
 import io
+import queue
+import struct
+import subprocess
+import threading
 import numpy as np
 import torch
-from typing import Union, Literal
+from functools import lru_cache, partial
+from typing import Callable, Dict, List, Optional, Tuple, Union, Literal
 from pydub import AudioSegment
 import soundfile as sf
 
@@ -11,35 +16,414 @@ import soundfile as sf
 AudioFormat = Literal["mp3", "opus", "aac", "flac", "wav", "pcm", "m4a"]
 
 
-def convert_to_16_bit_wav(audio: Union[np.ndarray, torch.Tensor]) -> np.ndarray:
+try:
+    import soxr
+except ImportError:
+    soxr = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+@lru_cache(maxsize=1)
+def _load_torchaudio():
+    """Import torchaudio on first use; only needed when soxr is missing."""
+    try:
+        import torchaudio
+    except ImportError:
+        return None
+    return torchaudio
+
+# Resample kernels keyed by (orig_sr, target_sr); building the FIR taps is
+# the dominant cost, so reuse them across requests
+_RESAMPLERS: Dict[Tuple[int, int], "torchaudio.transforms.Resample"] = {}
+
+
+def resample_audio(audio: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
     """
-    Convert audio to 16-bit PCM format.
+    Resample mono audio.
+    
+    Uses soxr (SIMD C resampler) when installed, otherwise a cached
+    torchaudio polyphase resampler, and finally librosa.
+    
+    Args:
+        audio: 1D audio array
+        orig_sr: Sample rate of the input
+        target_sr: Desired sample rate
+        
+    Returns:
+        Resampled float32 audio array
+    """
+    if orig_sr == target_sr:
+        return audio.astype(np.float32, copy=False)
+    
+    if soxr is not None:
+        return soxr.resample(
+            np.ascontiguousarray(audio, dtype=np.float32),
+            orig_sr,
+            target_sr,
+            quality="HQ",
+        )
+    
+    torchaudio = _load_torchaudio()
+    if torchaudio is None:
+        import librosa
+        
+        return librosa.resample(
+            audio.astype(np.float32, copy=False), orig_sr=orig_sr, target_sr=target_sr
+        )
+    
+    key = (orig_sr, target_sr)
+    resampler = _RESAMPLERS.get(key)
+    if resampler is None:
+        resampler = torchaudio.transforms.Resample(orig_sr, target_sr)
+        _RESAMPLERS[key] = resampler
+    
+    with torch.inference_mode():
+        tensor = torch.from_numpy(np.ascontiguousarray(audio, dtype=np.float32))
+        return resampler(tensor).numpy()
+
+
+def downmix_to_mono(audio: np.ndarray) -> np.ndarray:
+    """
+    Average (frames, channels) audio down to a float32 mono array.
+    
+    Stereo, the common case, is averaged directly in float32 instead of going
+    through np.mean's float64 accumulator.
+    
+    Args:
+        audio: 1D or (frames, channels) audio array
+        
+    Returns:
+        1D float32 audio array
+    """
+    if audio.ndim == 1:
+        return audio.astype(np.float32, copy=False)
+    
+    if audio.shape[1] == 2:
+        mono = audio[:, 0].astype(np.float32)
+        mono += audio[:, 1]
+        mono *= np.float32(0.5)
+        return mono
+    
+    return audio.mean(axis=1, dtype=np.float32)
+
+
+def _as_float32_1d(audio: Union[np.ndarray, torch.Tensor]) -> np.ndarray:
+    """
+    Flatten audio to a contiguous float32 numpy array.
+    
+    Copies only when the device, dtype or memory layout requires it; a
+    contiguous float32 array comes back as a view of the input.
     
     Args:
         audio: Audio data as numpy array or torch tensor
         
     Returns:
-        16-bit PCM audio as numpy array
+        1D float32 audio array
     """
-    # Convert tensor to numpy if needed
     if torch.is_tensor(audio):
-        audio = audio.detach().cpu().numpy()
+        audio = audio.detach().cpu()
+        # numpy has no bfloat16, so upcast on the host before converting
+        if audio.dtype != torch.float32:
+            audio = audio.to(torch.float32)
+        audio = audio.numpy()
+    
+    return np.ascontiguousarray(audio, dtype=np.float32).reshape(-1)
+
+
+if njit is not None:
+
+    # The explicit signature compiles at import (loaded from the on-disk
+    # cache after the first run) instead of on the first request; no
+    # fastmath, so NaN/inf handling matches the NumPy fallback's IEEE rules
+    @njit("int16[:](float32[:], int16[:])", cache=True)
+    def _f32_to_s16(audio: np.ndarray, out: np.ndarray) -> np.ndarray:
+        """Fused peak-find, normalize, round and clamp to int16 (1D float32)."""
+        peak = np.float32(0.0)
+        for i in range(audio.size):
+            v = abs(audio[i])
+            if v > peak:
+                peak = v
+        scale = np.float32(32767.0 / peak if peak > 1.0 else 32767.0)
+
+        for i in range(audio.size):
+            v = np.rint(audio[i] * scale)
+            if v > 32767.0:
+                v = 32767.0
+            elif v < -32768.0:
+                v = -32768.0
+            out[i] = np.int16(v)
+        return out
+
+else:
+    _f32_to_s16 = None
+
+
+# Per-thread scratch arrays reused across conversions; buffers larger than
+# the cap are allocated per call so a long clip doesn't stay resident
+_scratch = threading.local()
+_MIN_SCRATCH_SAMPLES = 1 << 14
+_MAX_SCRATCH_SAMPLES = 1 << 20
+
+
+def _scratch_buffer(size: int, dtype: np.dtype) -> Optional[np.ndarray]:
+    """Get a reusable per-thread buffer of ``size`` elements (None above the cap)."""
+    if size > _MAX_SCRATCH_SAMPLES:
+        return None
+    buffers = getattr(_scratch, "buffers", None)
+    if buffers is None:
+        buffers = _scratch.buffers = {}
+    key = np.dtype(dtype).char
+    buf = buffers.get(key)
+    if buf is None or buf.size < size:
+        buf = np.empty(max(size, _MIN_SCRATCH_SAMPLES), dtype=dtype)
+        buffers[key] = buf
+    return buf[:size]
+
+
+def convert_to_16_bit_wav(
+    audio: Union[np.ndarray, torch.Tensor], out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Convert audio to 16-bit PCM format.
+    
+    Args:
+        audio: Audio data as numpy array or torch tensor
+        out: Optional int16 array of matching length to write into
+        
+    Returns:
+        16-bit PCM audio as numpy array (``out`` when given)
+    """
+    audio = _as_float32_1d(audio)
+    if out is None:
+        out = np.empty(audio.size, dtype=np.int16)
+    if audio.size == 0:
+        return out
+    
+    if _f32_to_s16 is not None:
+        return _f32_to_s16(audio, out)
+    
+    # Normalize to range [-1, 1] if needed, folded into the int16 scale
+    # (max/min are two passes but, unlike abs().max(), need no temporary)
+    peak = max(float(audio.max()), -float(audio.min()))
+    scale = 32767.0 / max(peak, 1.0)
+    
+    # One float scratch buffer for scale + round + clamp (the input is never
+    # modified), then a single cast into the 16-bit output. The clamp matches
+    # the numba kernel and guarantees the cast can never wrap around.
+    scaled = np.multiply(
+        audio, np.float32(scale), out=_scratch_buffer(audio.size, np.float32)
+    )
+    np.rint(scaled, out=scaled)
+    np.clip(scaled, -32768.0, 32767.0, out=scaled)
+    np.copyto(out, scaled, casting="unsafe")
+    return out
+
+
+def _encode_pcm(audio_16bit: np.ndarray, sample_rate: int, bitrate: str) -> bytes:
+    """Return raw 16-bit PCM data."""
+    return audio_16bit.tobytes()
+
+
+def _encode_wav(audio_16bit: np.ndarray, sample_rate: int, bitrate: str) -> bytes:
+    """Create a 16-bit WAV file in memory."""
+    # The samples are already int16, so the file is just header + data
+    return _wav_header(len(audio_16bit), sample_rate) + audio_16bit.tobytes()
+
+
+def _encode_flac(audio_16bit: np.ndarray, sample_rate: int, bitrate: str) -> bytes:
+    """Encode FLAC in-process with libsndfile."""
+    # Avoids spawning ffmpeg for a format libsndfile writes natively
+    buffer = io.BytesIO()
+    sf.write(buffer, audio_16bit, sample_rate, format='FLAC', subtype='PCM_16')
+    return buffer.getvalue()
+
+
+# ffmpeg output arguments per format (bitrate is added for lossy formats)
+_FFMPEG_OUTPUT_ARGS = {
+    "mp3": ["-f", "mp3"],
+    "opus": ["-c:a", "libopus", "-f", "opus"],
+    "aac": ["-c:a", "aac", "-f", "adts"],
+    # m4a is AAC in an MP4 container; fragmented so it can be written to a pipe
+    "m4a": ["-c:a", "aac", "-movflags", "frag_keyframe+empty_moov", "-f", "mp4"],
+    # Whole FLAC files use libsndfile; ffmpeg only encodes FLAC streams
+    "flac": ["-f", "flac"],
+}
+_LOSSY_FORMATS = frozenset({"mp3", "opus", "aac", "m4a"})
+
+
+def _ffmpeg_command(format: str, sample_rate: int, bitrate: str) -> List[str]:
+    """Build an ffmpeg command that encodes mono s16le PCM from stdin to stdout."""
+    # Raw PCM goes in on stdin and the encoded file comes out on stdout, so
+    # there is no intermediate WAV to build and re-parse
+    cmd = [
+        AudioSegment.converter, "-hide_banner", "-loglevel", "error",
+        "-f", "s16le", "-ar", str(sample_rate), "-ac", "1", "-i", "pipe:0",
+    ]
+    if format in _LOSSY_FORMATS:
+        cmd += ["-b:a", bitrate]
+    cmd += _FFMPEG_OUTPUT_ARGS.get(format, ["-f", format])
+    cmd.append("pipe:1")
+    return cmd
+
+
+def _encode_ffmpeg(
+    audio_16bit: np.ndarray, sample_rate: int, bitrate: str, format: str
+) -> bytes:
+    """Encode via a single ffmpeg process (mp3, opus, aac, m4a, flac)."""
+    proc = subprocess.run(
+        _ffmpeg_command(format, sample_rate, bitrate),
+        input=audio_16bit.tobytes(),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(
+            f"ffmpeg failed to encode {format}: {proc.stderr.decode(errors='replace').strip()}"
+        )
+    return proc.stdout
+
+
+class FfmpegStreamEncoder:
+    """
+    One ffmpeg process that encodes a PCM stream chunk by chunk.
+    
+    Starting ffmpeg per chunk costs far more than encoding ~20 ms of audio,
+    and every chunk would come back as a separate file. This keeps a single
+    process open for the whole stream: chunks are written to its stdin and
+    a reader thread collects whatever it has encoded so far, so the client
+    receives one continuous bitstream.
+    
+    Use as a context manager; call ``finish()`` once the input is exhausted
+    to flush the encoder's remaining output.
+    """
+    
+    def __init__(self, format: str, sample_rate: int = 24000, bitrate: str = "128k"):
+        """
+        Start the encoder process.
+        
+        Args:
+            format: Output format (mp3, opus, aac, m4a, flac)
+            sample_rate: Sample rate of the PCM input
+            bitrate: Bitrate for lossy formats (e.g., "128k", "192k")
+        """
+        self.format = format
+        self._output: "queue.Queue[bytes]" = queue.Queue()
+        self._proc = subprocess.Popen(
+            _ffmpeg_command(format, sample_rate, bitrate),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        # Draining stdout on its own thread keeps ffmpeg from blocking on a
+        # full pipe while we are still writing input
+        self._reader = threading.Thread(
+            target=self._drain, name="ffmpeg-stream-reader", daemon=True
+        )
+        self._reader.start()
     
-    # Ensure numpy array
-    audio = np.array(audio, dtype=np.float32)
+    def __enter__(self) -> "FfmpegStreamEncoder":
+        return self
     
-    # Ensure 1D
-    if len(audio.shape) > 1:
-        audio = audio.squeeze()
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
     
-    # Normalize to range [-1, 1] if needed
-    if np.max(np.abs(audio)) > 1.0:
-        audio = audio / np.max(np.abs(audio))
+    def _drain(self) -> None:
+        """Move encoder output from the stdout pipe into the output queue."""
+        stdout = self._proc.stdout
+        while True:
+            data = stdout.read1(65536)
+            if not data:
+                break
+            self._output.put(data)
     
-    # Scale to 16-bit integer range
-    audio_16bit = (audio * 32767).astype(np.int16)
+    def _collect(self, timeout: float = 0.0) -> bytes:
+        """Return encoded output so far, waiting up to timeout for the first piece."""
+        parts = []
+        try:
+            if timeout > 0:
+                parts.append(self._output.get(timeout=timeout))
+            while True:
+                parts.append(self._output.get_nowait())
+        except queue.Empty:
+            pass
+        return b"".join(parts)
     
-    return audio_16bit
+    def _error(self) -> RuntimeError:
+        stderr = self._proc.stderr.read().decode(errors="replace").strip()
+        return RuntimeError(f"ffmpeg failed to encode {self.format}: {stderr}")
+    
+    def encode_chunk(self, pcm_bytes: bytes, timeout: float = 0.0) -> bytes:
+        """
+        Feed 16-bit PCM to the encoder.
+        
+        Encoders buffer a frame or two of lookahead, so the bytes returned
+        belong to earlier input; anything still pending comes out of a later
+        call or ``finish()``.
+        
+        Args:
+            pcm_bytes: Mono s16le samples
+            timeout: Seconds to wait for new output (0 = return immediately)
+            
+        Returns:
+            Encoded bytes available so far (may be empty)
+        """
+        try:
+            self._proc.stdin.write(pcm_bytes)
+            self._proc.stdin.flush()
+        except BrokenPipeError:
+            self._proc.wait()
+            raise self._error() from None
+        return self._collect(timeout)
+    
+    def finish(self) -> bytes:
+        """
+        Close the input and wait for the encoder to flush.
+        
+        Returns:
+            Remaining encoded bytes
+        """
+        try:
+            self._proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        self._reader.join()
+        if self._proc.wait() != 0:
+            raise self._error()
+        return self._collect()
+    
+    def close(self) -> None:
+        """Stop the encoder process if it is still running."""
+        if self._proc.poll() is None:
+            self._proc.kill()
+            self._proc.wait()
+        for pipe in (self._proc.stdin, self._proc.stdout, self._proc.stderr):
+            try:
+                pipe.close()
+            except (BrokenPipeError, OSError):
+                pass
+        self._reader.join()
+
+
+_FORMAT_ENCODERS: Dict[str, Callable[[np.ndarray, int, str], bytes]] = {
+    "pcm": _encode_pcm,
+    "wav": _encode_wav,
+    **{fmt: partial(_encode_ffmpeg, format=fmt) for fmt in _FFMPEG_OUTPUT_ARGS},
+    "flac": _encode_flac,
+}
+
+_FORMAT_MIME: Dict[str, str] = {
+    "mp3": "audio/mpeg",
+    "opus": "audio/opus",
+    "aac": "audio/aac",
+    "flac": "audio/flac",
+    "wav": "audio/wav",
+    "pcm": "application/octet-stream",
+    "m4a": "audio/mp4"
+}
 
 
 def audio_to_bytes(
@@ -60,53 +444,78 @@ def audio_to_bytes(
     Returns:
         Audio data as bytes
     """
-    # Convert to 16-bit PCM
-    audio_16bit = convert_to_16_bit_wav(audio)
-    
-    if format == "pcm":
-        # Return raw PCM data
-        return audio_16bit.tobytes()
-    
-    elif format == "wav":
-        # Create WAV file in memory
-        buffer = io.BytesIO()
-        sf.write(buffer, audio_16bit, sample_rate, format='WAV', subtype='PCM_16')
-        buffer.seek(0)
-        return buffer.read()
-    
-    else:
-        # Use pydub for other formats (mp3, opus, aac, flac)
-        # First create WAV in memory
-        wav_buffer = io.BytesIO()
-        sf.write(wav_buffer, audio_16bit, sample_rate, format='WAV', subtype='PCM_16')
-        wav_buffer.seek(0)
-        
-        # Load with pydub
-        audio_segment = AudioSegment.from_wav(wav_buffer)
-        
-        # Export to target format
-        output_buffer = io.BytesIO()
-        
-        export_params = {
-            "format": format,
-        }
-        
-        # Add bitrate for lossy formats
-        if format in ["mp3", "opus", "aac", "m4a"]:
-            export_params["bitrate"] = bitrate
-        
-        # Special handling for opus
-        if format == "opus":
-            export_params["codec"] = "libopus"
-        
-        # m4a is AAC in MP4 container
-        if format == "m4a":
-            export_params["codec"] = "aac"
+    # Convert to 16-bit PCM; every encoder copies the samples out, so the
+    # conversion can go into this thread's reusable buffer
+    audio = _as_float32_1d(audio)
+    audio_16bit = convert_to_16_bit_wav(
+        audio, out=_scratch_buffer(audio.size, np.int16)
+    )
+    
+    encoder = _FORMAT_ENCODERS.get(format)
+    if encoder is None:
+        # Let ffmpeg try any other format
+        encoder = partial(_encode_ffmpeg, format=format)
+    
+    return encoder(audio_16bit, sample_rate, bitrate)
+
+
+# Mono 16-bit PCM WAV header; only the sizes and rate fields vary per file
+_WAV_HEADER_TEMPLATE = struct.pack(
+    "<4sI4s4sIHHIIHH4sI",
+    b"RIFF", 0, b"WAVE",
+    b"fmt ", 16, 1, 1, 0, 0, 2, 16,
+    b"data", 0,
+)
+
+
+def _wav_header(num_samples: Optional[int], sample_rate: int) -> bytes:
+    """
+    Build a 44-byte header for mono 16-bit PCM WAV data.
+    
+    ``num_samples=None`` marks a stream of unknown length by setting the
+    sizes to their maximum, which players treat as "read until EOF".
+    """
+    data_size = 0xFFFFFFDB if num_samples is None else num_samples * 2
+    header = bytearray(_WAV_HEADER_TEMPLATE)
+    struct.pack_into("<I", header, 4, 36 + data_size)
+    struct.pack_into("<II", header, 24, sample_rate, sample_rate * 2)
+    struct.pack_into("<I", header, 40, data_size)
+    return bytes(header)
+
+
+def wav_stream_header(sample_rate: int = 24000) -> bytes:
+    """
+    Get a WAV header for a mono 16-bit stream whose length is not known yet.
+    
+    Args:
+        sample_rate: Sample rate of the audio
         
-        audio_segment.export(output_buffer, **export_params)
-        output_buffer.seek(0)
+    Returns:
+        44-byte WAV header to send ahead of raw PCM frames
+    """
+    return _wav_header(None, sample_rate)
+
+
+def _pcm_view(audio_16bit: np.ndarray) -> memoryview:
+    """Expose int16 samples as a flat byte view (no copy)."""
+    return memoryview(np.ascontiguousarray(audio_16bit)).cast("B")
+
+
+def audio_to_pcm_view(audio: Union[np.ndarray, torch.Tensor]) -> memoryview:
+    """
+    Convert audio to 16-bit PCM bytes without the ``tobytes()`` copy.
+    
+    Unlike ``audio_to_bytes(format="pcm")`` the samples are converted into a
+    fresh array that the returned view keeps alive, so it can be handed
+    straight to the HTTP writer.
+    
+    Args:
+        audio: Audio data as numpy array or torch tensor
         
-        return output_buffer.read()
+    Returns:
+        Byte view over the 16-bit PCM samples
+    """
+    return _pcm_view(convert_to_16_bit_wav(audio))
 
 
 def get_audio_duration(audio: Union[np.ndarray, torch.Tensor], sample_rate: int = 24000) -> float:
@@ -120,14 +529,13 @@ def get_audio_duration(audio: Union[np.ndarray, torch.Tensor], sample_rate: int
     Returns:
         Duration in seconds
     """
-    if torch.is_tensor(audio):
-        audio = audio.detach().cpu().numpy()
-    
-    audio = np.array(audio)
-    if len(audio.shape) > 1:
-        audio = audio.squeeze()
+    # Only the shape is needed, so never copy or move the samples
+    shape = tuple(np.shape(audio))
+    if len(shape) > 1:
+        # Same as squeeze(): drop singleton channel/batch dims
+        shape = tuple(dim for dim in shape if dim != 1) or (1,)
     
-    return len(audio) / sample_rate
+    return shape[0] / sample_rate
 
 
 def get_content_type(format: AudioFormat) -> str:
@@ -140,16 +548,7 @@ def get_content_type(format: AudioFormat) -> str:
     Returns:
         MIME content type string
     """
-    content_types = {
-        "mp3": "audio/mpeg",
-        "opus": "audio/opus",
-        "aac": "audio/aac",
-        "flac": "audio/flac",
-        "wav": "audio/wav",
-        "pcm": "application/octet-stream",
-        "m4a": "audio/mp4"
-    }
-    return content_types.get(format, "application/octet-stream")
+    return _FORMAT_MIME.get(format, "application/octet-stream")
 
 
 def concatenate_audio_chunks(
@@ -167,17 +566,15 @@ def concatenate_audio_chunks(
     if not chunks:
         return np.array([], dtype=np.float32)
     
-    # Convert all chunks to numpy
-    numpy_chunks = []
-    for chunk in chunks:
-        if torch.is_tensor(chunk):
-            chunk = chunk.detach().cpu().numpy()
-        chunk = np.array(chunk, dtype=np.float32)
-        if len(chunk.shape) > 1:
-            chunk = chunk.squeeze()
-        numpy_chunks.append(chunk)
-    
-    # Concatenate
-    return np.concatenate(numpy_chunks)
+    # Size the output from the shapes alone, then copy each chunk straight
+    # into place instead of collecting converted copies to concatenate
+    sizes = [int(np.prod(np.shape(chunk))) for chunk in chunks]
+    out = np.empty(sum(sizes), dtype=np.float32)
+    offset = 0
+    for chunk, size in zip(chunks, sizes):
+        out[offset:offset + size] = _as_float32_1d(chunk)
+        offset += size
+    
+    return out
 
 
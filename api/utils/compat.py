@@ -1,6 +1,6 @@
 """Compatibility layer for different transformers versions."""
 
-from typing import Optional
+from typing import Any
 
 # Try to import FlashAttentionKwargs from transformers 4.51.3+
 try:
@@ -14,12 +14,12 @@ except ImportError:
         """Compatibility stub for FlashAttentionKwargs in older transformers versions."""
 
         # Add common flash attention kwargs as needed
-        attention_mask: Optional = None
-        causal: Optional = None
-        alibi_bias: Optional = None
-        alibi_bias_max: Optional = None
-        use_flash_attention: Optional = None
-        use_flash_attention_2: Optional = None
+        attention_mask: Any = None
+        causal: Any = None
+        alibi_bias: Any = None
+        alibi_bias_max: Any = None
+        use_flash_attention: Any = None
+        use_flash_attention_2: Any = None
 
 
 __all__ = ["FlashAttentionKwargs"]
@@ -1,7 +1,28 @@
 """Language detection utilities for TTS service."""
 
+from functools import lru_cache
+from typing import Optional
+
 from langdetect import detect, LangDetectException
 
+try:
+    # Compiled neural language ID; far faster than langdetect's Python n-grams
+    import gcld3
+except ImportError:
+    gcld3 = None
+
+_detector = (
+    gcld3.NNetLanguageIdentifier(min_num_bytes=0, max_num_bytes=1000)
+    if gcld3 is not None
+    else None
+)
+
+# The opening of a prompt is almost always enough to tell its language
+_DETECT_PREFIX_CHARS = 256
+
+# Legacy codes emitted by CLD3
+_CLD3_CODE_ALIASES = {"iw": "he"}
+
 LANGUAGE_CODE_TO_NAME = {
     "es": "spanish",
     "en": "english",
@@ -88,14 +109,34 @@ def detect_language(text: str) -> str:
     Notes:
         - Very short text may have lower accuracy
         - For best results with short text, use explicit language parameter
+        - Only the first 256 characters are examined
     """
-    try:
-        # Detect language code from text
-        lang_code = detect(text)
+    return _detect_language_prefix(text[:_DETECT_PREFIX_CHARS])
 
-        # Map language code to full name
-        return LANGUAGE_CODE_TO_NAME.get(lang_code, "english")
 
-    except LangDetectException:
+@lru_cache(maxsize=1024)
+def _detect_language_prefix(text: str) -> str:
+    """Detect the language of a (truncated) text; results are memoized."""
+    lang_code = _detect_language_code(text)
+    if lang_code is None:
         # Fallback to English if detection fails
         return "english"
+
+    # Drop region/script suffixes such as "zh-cn" or "zh-Latn"
+    lang_code = lang_code.split("-", 1)[0].lower()
+    lang_code = _CLD3_CODE_ALIASES.get(lang_code, lang_code)
+
+    # Map language code to full name
+    return LANGUAGE_CODE_TO_NAME.get(lang_code, "english")
+
+
+def _detect_language_code(text: str) -> Optional[str]:
+    """Return the raw code from whichever detector is installed, or None."""
+    if _detector is not None:
+        result = _detector.FindLanguage(text=text)
+        return result.language if result.is_reliable else None
+
+    try:
+        return detect(text)
+    except LangDetectException:
+        return None
@@ -1,6 +1,18 @@
 import re
 import unicodedata
 
+# C0/C1 control characters other than tab and newline
+_CONTROL_CHARS_RE = re.compile(r"[\x00-\x08\x0B-\x1F\x7F-\x9F]")
+
+# Same set as a deletion table; str.translate has an ASCII fast path that
+# beats the regex on ASCII text but is much slower on anything else
+_CONTROL_CHARS_TABLE = dict.fromkeys(
+    [c for c in range(0x20) if c not in (0x09, 0x0A)] + list(range(0x7F, 0xA0))
+)
+
+# Table that drops tab and newline, for the printable check below
+_STRIP_TAB_NEWLINE = str.maketrans("", "", "\n\t")
+
 
 def sanitize_text(text: str) -> str:
     """
@@ -29,11 +41,33 @@ def sanitize_text(text: str) -> str:
     # simple regex to keep alphanumeric, punctuation, whitespace, and common symbols/emojis
 
     # Identify control characters (Cc) and remove them, except \n and \t
-    text = "".join(
-        ch for ch in text if unicodedata.category(ch)[0] != "C" or ch in "\n\t"
-    )
+    if text.isascii():
+        text = text.translate(_CONTROL_CHARS_TABLE)
+    else:
+        text = _CONTROL_CHARS_RE.sub("", text)
+
+    # Other "C" categories (format, private use, unassigned) are rare, so only
+    # classify per character when the C-level printable check finds something
+    if not text.translate(_STRIP_TAB_NEWLINE).isprintable():
+        text = "".join(
+            ch for ch in text if unicodedata.category(ch)[0] != "C" or ch in "\n\t"
+        )
 
     # Replace multiple spaces/newlines with single ones (optional, but good for TTS consistency)
     # text = re.sub(r'\s+', ' ', text).strip() # careful, newlines might be semantic for pauses
 
     return text.strip()
+
+
+def preview_text(text: str, limit: int = 100) -> str:
+    """
+    Truncate text for log messages.
+
+    Args:
+        text: Input text string
+        limit: Maximum number of characters to keep
+
+    Returns:
+        Text cut to ``limit`` characters, with "..." appended if truncated
+    """
+    return text[:limit] + "..." if len(text) > limit else text
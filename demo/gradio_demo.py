@@ -4,27 +4,53 @@ This interface connects to the running VibeVoice FastAPI server.
 """
 
 import gradio as gr
+import atexit
 import requests
 import json
 import os
 import base64
+import binascii
+import shutil
 import time
 import numpy as np
 from typing import List, Dict, Any, Generator, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Configuration
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8001")
 
+# Streaming download sizes
+STREAM_READ_SIZE = 1 << 16  # bytes per read from the response
+STREAM_PROGRESS_BYTES = 1 << 18  # flush + progress update interval
+SSE_WRITE_BATCH_BYTES = 1 << 17  # decoded SSE audio buffered per write
+
 
 class VibeVoiceClient:
     def __init__(self, base_url: str):
         self.base_url = base_url.rstrip("/")
         self.voices = []
 
+        # One pooled session so status/voice refreshes and generations reuse
+        # keep-alive connections instead of reconnecting on every call.
+        # Retry only covers idempotent requests (GET), never generation POSTs.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(total=2, backoff_factor=0.2),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self):
+        """Close pooled connections."""
+        self.session.close()
+
     def check_health(self) -> bool:
         """Check if the API is reachable."""
         try:
-            response = requests.get(f"{self.base_url}/health", timeout=2)
+            response = self.session.get(f"{self.base_url}/health", timeout=2)
             return response.status_code == 200
         except:
             return False
@@ -32,7 +58,7 @@ class VibeVoiceClient:
     def get_voices(self) -> List[str]:
         """Fetch available voice names."""
         try:
-            response = requests.get(f"{self.base_url}/v1/vibevoice/voices")
+            response = self.session.get(f"{self.base_url}/v1/vibevoice/voices")
             if response.status_code == 200:
                 data = response.json()
                 self.voices = [v["name"] for v in data.get("voices", [])]
@@ -44,7 +70,7 @@ class VibeVoiceClient:
     def get_voice_details(self) -> Dict:
         """Fetch full voice details."""
         try:
-            response = requests.get(f"{self.base_url}/v1/vibevoice/voices")
+            response = self.session.get(f"{self.base_url}/v1/vibevoice/voices")
             if response.status_code == 200:
                 return response.json()
         except Exception as e:
@@ -56,8 +82,10 @@ class VibeVoiceClient:
         if not file_path:
             return None
         with open(file_path, "rb") as f:
-            encoded = base64.b64encode(f.read()).decode("utf-8")
-        return encoded
+            data = f.read()
+        # b2a_base64 is the C routine behind b64encode, minus its wrapper;
+        # base64 output is pure ASCII
+        return binascii.b2a_base64(data, newline=False).decode("ascii")
 
     def generate_openai(self, text, voice, speed, response_format, language, model):
         """Generate using OpenAI-compatible endpoint."""
@@ -87,15 +115,16 @@ class VibeVoiceClient:
 
         try:
             start_time = time.time()
-            response = requests.post(url, json=payload, stream=True)
+            response = self.session.post(url, json=payload, stream=True)
 
             if response.status_code != 200:
                 raise gr.Error(f"API Error: {response.text}")
 
             output_path = f"speech_{int(time.time())}.{response_format}"
             with open(output_path, "wb") as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+                # No progress to report, so let copyfileobj do large reads in C
+                response.raw.decode_content = True
+                shutil.copyfileobj(response.raw, f, length=STREAM_READ_SIZE * 4)
 
             return output_path, f"✅ Generated in {time.time() - start_time:.2f}s"
         except Exception as e:
@@ -119,7 +148,17 @@ class VibeVoiceClient:
 
         try:
             if stream:
-                response = requests.post(url, json=payload, stream=True)
+                # Ask intermediaries not to cache or buffer the event stream.
+                # urllib3 already sets TCP_NODELAY on its sockets.
+                response = self.session.post(
+                    url,
+                    json=payload,
+                    stream=True,
+                    headers={
+                        "Accept": "text/event-stream",
+                        "Cache-Control": "no-cache",
+                    },
+                )
                 if response.status_code != 200:
                     raise gr.Error(f"API Error: {response.text}")
 
@@ -135,27 +174,42 @@ class VibeVoiceClient:
                     if is_sse:
                         import sseclient
 
+                        # Events carry JSON: {"audio": base64, ...}, then
+                        # {"done": true} or {"error": ...}. Decoded audio is
+                        # batched so the file sees one write per ~128 KB.
+                        pending = bytearray()
                         client = sseclient.SSEClient(response)
                         for event in client.events():
-                            if event.event == "audio":
-                                chunk_data = base64.b64decode(event.data)
-                                f.write(chunk_data)
+                            data = json.loads(event.data)
+                            if "error" in data:
+                                raise gr.Error(f"Stream Error: {data['error']}")
+                            if data.get("done"):
+                                break
+                            pending += base64.b64decode(data["audio"])
+                            chunk_count += 1
+                            if len(pending) >= SSE_WRITE_BATCH_BYTES:
+                                f.write(pending)
                                 f.flush()
-                                chunk_count += 1
-                                if chunk_count % 3 == 0:
-                                    yield (
-                                        partial_path,
-                                        f"Streaming... ({chunk_count} chunks)",
-                                    )
-                            elif event.event == "error":
-                                raise gr.Error(f"Stream Error: {event.data}")
+                                pending.clear()
+                                yield (
+                                    partial_path,
+                                    f"Streaming... ({chunk_count} chunks)",
+                                )
+                        f.write(pending)
                     else:
-                        for chunk in response.iter_content(chunk_size=4096):
+                        # Large reads; flush and report progress only every
+                        # STREAM_PROGRESS_BYTES instead of on every chunk
+                        unreported = 0
+                        for chunk in response.iter_content(
+                            chunk_size=STREAM_READ_SIZE
+                        ):
                             if chunk:
                                 f.write(chunk)
-                                f.flush()
                                 chunk_count += 1
-                                if chunk_count % 10 == 0:
+                                unreported += len(chunk)
+                                if unreported >= STREAM_PROGRESS_BYTES:
+                                    f.flush()
+                                    unreported = 0
                                     yield (
                                         partial_path,
                                         f"Streaming... ({chunk_count} chunks)",
@@ -167,7 +221,7 @@ class VibeVoiceClient:
                 )
             else:
                 start_time = time.time()
-                response = requests.post(url, json=payload)
+                response = self.session.post(url, json=payload)
                 if response.status_code != 200:
                     raise gr.Error(f"API Error: {response.text}")
 
@@ -187,6 +241,7 @@ class VibeVoiceClient:
 
 # Initialize Client
 client = VibeVoiceClient(API_BASE_URL)
+atexit.register(client.close)
 
 # --- UI Construction ---
 custom_css = """
@@ -218,9 +273,6 @@ with gr.Blocks(title="VibeVoice Studio", css=custom_css, theme=gr.themes.Soft())
         api_status = gr.Markdown("Connecting to API...")
         refresh_status_btn = gr.Button("🔄 Check Connection", size="sm")
 
-    # State
-    voice_list = gr.State([])
-
     def update_system_status():
         is_up = client.check_health()
         voices = client.get_voices() if is_up else []
@@ -229,15 +281,9 @@ with gr.Blocks(title="VibeVoice Studio", css=custom_css, theme=gr.themes.Soft())
             if is_up
             else "❌ **API Offline** - Please start the server (./start.sh)"
         )
-        return (
-            status_text,
-            voices,
-            gr.update(choices=voices),
-            gr.update(choices=voices),
-            gr.update(choices=voices),
-            gr.update(choices=voices),
-            gr.update(choices=voices),
-        )
+        # Every voice dropdown gets the same choices update
+        choices = gr.update(choices=voices)
+        return (status_text,) + (choices,) * 5
 
     with gr.Tabs():
         # --- TAB 1: STORYTELLER (Advanced) ---
@@ -451,31 +497,17 @@ with gr.Blocks(title="VibeVoice Studio", css=custom_css, theme=gr.themes.Soft())
             lib_view = gr.JSON(label="Voice Details")
             refresh_lib_btn.click(client.get_voice_details, outputs=lib_view)
 
-    # Init
-    app.load(
-        update_system_status,
-        outputs=[
-            api_status,
-            voice_list,
-            oa_voice,
-            spk0_preset,
-            spk1_preset,
-            spk2_preset,
-            spk3_preset,
-        ],
-    )
-    refresh_status_btn.click(
-        update_system_status,
-        outputs=[
-            api_status,
-            voice_list,
-            oa_voice,
-            spk0_preset,
-            spk1_preset,
-            spk2_preset,
-            spk3_preset,
-        ],
-    )
+    # Init; Gradio returns all outputs of one event in a single message
+    status_outputs = [
+        api_status,
+        oa_voice,
+        spk0_preset,
+        spk1_preset,
+        spk2_preset,
+        spk3_preset,
+    ]
+    app.load(update_system_status, outputs=status_outputs)
+    refresh_status_btn.click(update_system_status, outputs=status_outputs)
 
 if __name__ == "__main__":
     port = int(os.getenv("GRADIO_PORT", 7860))
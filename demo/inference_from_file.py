@@ -90,6 +90,10 @@ class VoiceMapper:
         return default_voice
 
 
+# Pattern to match "Speaker X:" format where X is a number
+SPEAKER_LINE_RE = re.compile(r'^Speaker\s+(\d+):\s*(.*)$', re.IGNORECASE)
+
+
 def parse_txt_script(txt_content: str) -> Tuple[List[str], List[str]]:
     """
     Parse txt script content and extract speakers and their text
@@ -100,9 +104,6 @@ def parse_txt_script(txt_content: str) -> Tuple[List[str], List[str]]:
     scripts = []
     speaker_numbers = []
     
-    # Pattern to match "Speaker X:" format where X is a number
-    speaker_pattern = r'^Speaker\s+(\d+):\s*(.*)$'
-    
     current_speaker = None
     current_text = ""
     
@@ -111,7 +112,7 @@ def parse_txt_script(txt_content: str) -> Tuple[List[str], List[str]]:
         if not line:
             continue
             
-        match = re.match(speaker_pattern, line, re.IGNORECASE)
+        match = SPEAKER_LINE_RE.match(line)
         if match:
             # If we have accumulated text from previous speaker, save it
             if current_speaker and current_text:
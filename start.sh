@@ -41,5 +41,7 @@ uvicorn api.main:app \
     --host $HOST \
     --port $PORT \
     --workers $WORKERS \
+    --loop uvloop \
+    --http httptools \
     --log-level $LOG_LEVEL
 